@@ -0,0 +1,142 @@
+"""Streaming anomaly detection on the sampled series.
+
+Each watched field keeps an exponentially weighted mean and variance, so a new
+sample is scored and absorbed in O(1) without looking at the history. A
+sample whose z-score exceeds the threshold is reported as a spike (raids,
+floods) or a drop (outages, mass leaves). Flagged values are clamped before
+they update the baseline, so one burst does not teach the detector that bursts
+are normal, while a lasting shift is still learnt over a few samples.
+
+The state is a handful of numbers per field and is saved to a small JSON file
+after every sample, so a restart resumes with a warm baseline.
+"""
+import os
+import json
+import math
+import logging
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class EwmaStat:
+    """Exponentially weighted mean and variance of one series."""
+
+    __slots__ = ('mean', 'var', 'count')
+
+    def __init__(self, mean=0.0, var=0.0, count=0):
+        self.mean = mean
+        self.var = var
+        self.count = count
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    def score(self, value, min_std=1.0):
+        """z-score of `value` against the current baseline."""
+        return (value - self.mean) / max(self.std, min_std)
+
+    def update(self, value, alpha):
+        if self.count == 0:
+            self.mean = float(value)
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+
+
+class AnomalyDetector:
+    """EWMA/z-score detector over several fields with per-field alert cooldowns.
+
+    `warmup` samples are absorbed before anything is flagged, `min_std` keeps
+    near-constant series (a quiet server at 0 messages) from flagging every
+    small change, and an alert for a field and direction is suppressed for
+    `cooldown` seconds after the previous one.
+    """
+
+    def __init__(self, fields, alpha=0.1, threshold=4.0, warmup=12, min_std=1.0, cooldown=3600, path=None):
+        self.fields = list(fields)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.cooldown = cooldown
+        self.path = path
+        self.stats = {field: EwmaStat() for field in self.fields}
+        self.last_alert = {}
+
+    def prime(self, field, values):
+        """Learn a baseline from past values, e.g. the tail of the history."""
+        stat = self.stats[field]
+        for value in values:
+            self._absorb(stat, value)
+
+    def observe(self, values, ts):
+        """Score and absorb one sample; return the anomalies worth alerting on."""
+        anomalies = []
+        for field in self.fields:
+            if field not in values:
+                continue
+            value = values[field]
+            stat = self.stats[field]
+            if stat.count >= self.warmup:
+                z = stat.score(value, self.min_std)
+                if abs(z) >= self.threshold:
+                    direction = 'spike' if z > 0 else 'drop'
+                    key = f'{field}:{direction}'
+                    if ts - self.last_alert.get(key, float('-inf')) >= self.cooldown:
+                        self.last_alert[key] = ts
+                        anomalies.append({
+                            'field': field,
+                            'direction': direction,
+                            'value': value,
+                            'expected': stat.mean,
+                            'std': stat.std,
+                            'z': z,
+                        })
+            self._absorb(stat, value)
+        return anomalies
+
+    def _absorb(self, stat, value):
+        if stat.count >= self.warmup:
+            limit = self.threshold * max(stat.std, self.min_std)
+            value = min(max(value, stat.mean - limit), stat.mean + limit)
+        stat.update(value, self.alpha)
+
+    def load(self):
+        """Restore saved state; False if there is none or it does not fit."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            for field in self.fields:
+                saved = state['stats'][field]
+                self.stats[field] = EwmaStat(saved['mean'], saved['var'], saved['count'])
+            self.last_alert = state.get('last_alert', {})
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable anomaly state {self.path}: {e}")
+            return False
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        write_json_atomic(self.path, {
+            'stats': {field: {'mean': s.mean, 'var': s.var, 'count': s.count} for field, s in self.stats.items()},
+            'last_alert': self.last_alert,
+        })
+
+
+def describe(anomaly):
+    """One-line human description of an anomaly returned by observe()."""
+    field = anomaly['field'].replace('_', ' ')
+    kind = 'Spike' if anomaly['direction'] == 'spike' else 'Drop'
+    return (
+        f"{kind} in {field}: {anomaly['value']} "
+        f"(expected about {anomaly['expected']:.0f} ± {anomaly['std']:.0f}, z={anomaly['z']:+.1f})"
+    )
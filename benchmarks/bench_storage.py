@@ -0,0 +1,301 @@
+"""Storage backend benchmark with growth curves.
+
+Every monitoring tick appends one sample per series, and with the current JSON
+array files that means loading and rewriting the whole history. This benchmark
+simulates months of samples at several sampling intervals and measures, for
+each storage format and history size:
+
+    append      latency of appending one sample
+    load        time to read the full history back
+    range       time to answer a last-24-hours query
+    size        bytes on disk
+    memory      peak Python memory while loading the full history
+
+Formats: the current indented JSON array, JSON Lines, SQLite, and a columnar
+layout of fixed-width binary arrays (one file per field).
+
+Usage:
+    python benchmarks/bench_storage.py --months 1 3 6 --interval 1 10
+    python benchmarks/bench_storage.py --format json-array --format sqlite --json storage.json
+"""
+import os
+import sys
+import json
+import array
+import bisect
+import shutil
+import random
+import sqlite3
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+RANGE_QUERY_SECONDS = 24 * 3600
+START = datetime(2025, 1, 1)
+
+
+def generate_samples(count, interval_minutes, seed):
+    """Yield (epoch_seconds, total_members, online_members) with a gentle daily cycle."""
+    rng = random.Random(seed)
+    total = 180
+    start = START.timestamp()
+    for i in range(count):
+        if rng.random() < 0.01:
+            total += rng.choice((-1, 1, 1))
+        online = max(0, int(total * 0.15 + rng.gauss(0, 3)))
+        yield int(start + i * interval_minutes * 60), total, online
+
+
+def to_record(sample):
+    ts, total, online = sample
+    return {
+        "timestamp": datetime.utcfromtimestamp(ts).isoformat(),
+        "total_members": total,
+        "online_members": online,
+    }
+
+
+class JsonArrayStore:
+    """The monitor's current format: one indented JSON array rewritten on every append."""
+    name = 'json-array'
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'member_count.json')
+
+    def bulk_load(self, samples):
+        with open(self.path, 'w') as f:
+            json.dump([to_record(s) for s in samples], f, indent=2)
+
+    def append(self, sample):
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        data.append(to_record(sample))
+        with open(self.path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def load_all(self):
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def range_query(self, start, end):
+        start_iso = datetime.utcfromtimestamp(start).isoformat()
+        end_iso = datetime.utcfromtimestamp(end).isoformat()
+        return [r for r in self.load_all() if start_iso <= r['timestamp'] <= end_iso]
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+
+class JsonLinesStore:
+    """One compact JSON object per line; appends never touch existing data."""
+    name = 'jsonl'
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'member_count.jsonl')
+
+    def bulk_load(self, samples):
+        with open(self.path, 'w') as f:
+            for s in samples:
+                f.write(json.dumps(to_record(s), separators=(',', ':')) + '\n')
+
+    def append(self, sample):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(to_record(sample), separators=(',', ':')) + '\n')
+
+    def load_all(self):
+        with open(self.path, 'r') as f:
+            return [json.loads(line) for line in f]
+
+    def range_query(self, start, end):
+        start_iso = datetime.utcfromtimestamp(start).isoformat()
+        end_iso = datetime.utcfromtimestamp(end).isoformat()
+        result = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                # Timestamps sort lexically, so compare before parsing the line.
+                ts = line[14:40].split('"', 1)[0]
+                if start_iso <= ts <= end_iso:
+                    result.append(json.loads(line))
+        return result
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+
+class SqliteStore:
+    """SQLite table keyed by epoch seconds."""
+    name = 'sqlite'
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, 'stats.sqlite3')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS member_count ('
+            'ts INTEGER PRIMARY KEY, total_members INTEGER, online_members INTEGER)'
+        )
+
+    def bulk_load(self, samples):
+        with self.conn:
+            self.conn.executemany('INSERT INTO member_count VALUES (?, ?, ?)', samples)
+
+    def append(self, sample):
+        with self.conn:
+            self.conn.execute('INSERT INTO member_count VALUES (?, ?, ?)', sample)
+
+    def load_all(self):
+        return self.conn.execute('SELECT ts, total_members, online_members FROM member_count').fetchall()
+
+    def range_query(self, start, end):
+        return self.conn.execute(
+            'SELECT ts, total_members, online_members FROM member_count WHERE ts BETWEEN ? AND ?',
+            (start, end),
+        ).fetchall()
+
+    def size(self):
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return os.path.getsize(self.path)
+
+    def close(self):
+        self.conn.close()
+
+
+class ColumnarStore:
+    """One fixed-width binary array file per field, appended in place."""
+    name = 'columnar'
+    COLUMNS = (('ts', 'q'), ('total_members', 'I'), ('online_members', 'I'))
+
+    def __init__(self, directory):
+        self.paths = {name: os.path.join(directory, f'member_count.{name}.bin') for name, _ in self.COLUMNS}
+
+    def bulk_load(self, samples):
+        columns = {name: array.array(code) for name, code in self.COLUMNS}
+        for sample in samples:
+            for (name, _), value in zip(self.COLUMNS, sample):
+                columns[name].append(value)
+        for name, values in columns.items():
+            with open(self.paths[name], 'wb') as f:
+                values.tofile(f)
+
+    def append(self, sample):
+        for (name, code), value in zip(self.COLUMNS, sample):
+            with open(self.paths[name], 'ab') as f:
+                array.array(code, [value]).tofile(f)
+
+    def load_all(self):
+        columns = {}
+        for name, code in self.COLUMNS:
+            values = array.array(code)
+            with open(self.paths[name], 'rb') as f:
+                values.frombytes(f.read())
+            columns[name] = values
+        return columns
+
+    def range_query(self, start, end):
+        columns = self.load_all()
+        ts = columns['ts']
+        lo = bisect.bisect_left(ts, start)
+        hi = bisect.bisect_right(ts, end)
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def size(self):
+        return sum(os.path.getsize(path) for path in self.paths.values())
+
+
+FORMATS = {cls.name: cls for cls in (JsonArrayStore, JsonLinesStore, SqliteStore, ColumnarStore)}
+
+
+def timed(func, repeat):
+    """Return the best wall time of `repeat` calls to func()."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(fmt, months, interval, args):
+    count = int(months * 30 * 24 * 60 / interval)
+    directory = tempfile.mkdtemp(prefix=f'bench-{fmt}-')
+    store = FORMATS[fmt](directory)
+    try:
+        store.bulk_load(generate_samples(count, interval, args.seed))
+
+        # Appends continue the simulated series so timestamps stay ordered.
+        extra = list(generate_samples(count + args.appends, interval, args.seed))[count:]
+        append_times = []
+        for sample in extra:
+            started = time.perf_counter()
+            store.append(sample)
+            append_times.append(time.perf_counter() - started)
+
+        last_ts = extra[-1][0] if extra else int(START.timestamp() + count * interval * 60)
+        load_time = timed(store.load_all, args.repeat)
+        range_time = timed(lambda: store.range_query(last_ts - RANGE_QUERY_SECONDS, last_ts), args.repeat)
+
+        tracemalloc.start()
+        store.load_all()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'format': fmt,
+            'months': months,
+            'interval_minutes': interval,
+            'samples': count + len(extra),
+            'append_ms': 1000 * sum(append_times) / max(1, len(append_times)),
+            'load_ms': 1000 * load_time,
+            'range_ms': 1000 * range_time,
+            'size_bytes': store.size(),
+            'peak_memory_bytes': peak,
+        }
+    finally:
+        if hasattr(store, 'close'):
+            store.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def print_table(results):
+    header = (f"{'format':<11} {'months':>6} {'every':>6} {'samples':>9} {'append ms':>10} "
+              f"{'load ms':>9} {'range ms':>9} {'size KiB':>10} {'mem KiB':>10}")
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['format']:<11} {r['months']:>6g} {r['interval_minutes']:>5g}m {r['samples']:>9} "
+              f"{r['append_ms']:>10.3f} {r['load_ms']:>9.2f} {r['range_ms']:>9.2f} "
+              f"{r['size_bytes'] / 1024:>10.1f} {r['peak_memory_bytes'] / 1024:>10.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--months', type=float, nargs='+', default=[1, 3, 6],
+                        help='history lengths to simulate')
+    parser.add_argument('--interval', type=float, nargs='+', default=[10],
+                        help='sampling intervals in minutes')
+    parser.add_argument('--format', action='append', choices=sorted(FORMATS),
+                        help='only benchmark the named format (repeatable)')
+    parser.add_argument('--appends', type=int, default=5, help='appends timed per data point')
+    parser.add_argument('--repeat', type=int, default=3, help='timed loads and queries per data point')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', metavar='PATH', help='also write results as JSON to PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for interval in args.interval:
+        for months in args.months:
+            for fmt in args.format or FORMATS:
+                results.append(measure(fmt, months, interval, args))
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
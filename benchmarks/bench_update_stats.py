@@ -0,0 +1,317 @@
+"""Offline benchmark for monitor.update_stats() against a simulated guild.
+
+Builds a fake guild with a configurable number of text channels, members and a
+message-rate distribution, then runs full monitoring cycles with each message
+collection strategy. The fake channel.history() paginates 100 messages per
+request, the same page size discord.py uses, with configurable latency and
+429 responses, so strategies can be compared without a network connection.
+
+Usage:
+    python benchmarks/bench_update_stats.py --channels 50 --members 5000
+    python benchmarks/bench_update_stats.py --rate-limit 0.05 --json results.json
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PAGE_SIZE = 100
+
+
+class SimulatedHTTP:
+    """Counts the REST calls a cycle makes and injects latency and 429s."""
+
+    def __init__(self, latency, jitter, rate_limit, retry_after, seed):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.rate_limited = 0
+
+    async def request(self):
+        """Simulate one GET /channels/{id}/messages, retrying on 429 like discord.py."""
+        while True:
+            self.calls += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.rate_limit and self.random.random() < self.rate_limit:
+                self.rate_limited += 1
+                await asyncio.sleep(self.retry_after)
+                continue
+            return
+
+
+class FakeMessage:
+    __slots__ = ('id', 'created_at', 'content')
+
+    def __init__(self, message_id, created_at):
+        self.id = message_id
+        self.created_at = created_at
+        self.content = ''
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id, name, recent_messages, http, forbidden=False):
+        self.id = channel_id
+        self.name = name
+        self.recent_messages = recent_messages
+        self.http = http
+        self.forbidden = forbidden
+
+    async def history(self, limit=100, after=None, before=None, oldest_first=None):
+        """Yield the channel's recent messages one page of HISTORY_PAGE_SIZE at a time."""
+        if self.forbidden:
+            await self.http.request()
+            raise discord.Forbidden(SimpleNamespace(status=403, reason='Forbidden'), 'Missing Access')
+
+        remaining = self.recent_messages if limit is None else min(limit, self.recent_messages)
+        now = datetime.utcnow()
+        message_id = 0
+        while True:
+            await self.http.request()
+            page = min(HISTORY_PAGE_SIZE, remaining)
+            for _ in range(page):
+                message_id += 1
+                yield FakeMessage(message_id, now)
+            remaining -= page
+            # discord.py stops paginating once a page comes back short.
+            if page < HISTORY_PAGE_SIZE or remaining <= 0:
+                return
+
+
+class FakeMember:
+    __slots__ = ('id', 'status')
+
+    def __init__(self, member_id, status):
+        self.id = member_id
+        self.status = status
+
+
+class FakeGuild:
+    def __init__(self, guild_id, text_channels, members):
+        self.id = guild_id
+        self.name = 'Simulated Guild'
+        self.text_channels = text_channels
+        self.members = members
+        self.member_count = len(members)
+
+
+def channel_weights(count, distribution, rng):
+    """Return relative message rates for `count` channels."""
+    if distribution == 'uniform':
+        return [1.0] * count
+    if distribution == 'zipf':
+        return [1.0 / (rank ** 1.2) for rank in range(1, count + 1)]
+    if distribution == 'burst':
+        # A handful of channels carry almost all of the traffic.
+        hot = max(1, count // 10)
+        return [50.0 if i < hot else rng.uniform(0, 1) for i in range(count)]
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def build_guild(args, http):
+    rng = random.Random(args.seed)
+    weights = channel_weights(args.channels, args.distribution, rng)
+    total_weight = sum(weights) or 1.0
+    window_messages = args.messages_per_min * 10
+
+    channels = []
+    for i, weight in enumerate(weights):
+        recent = int(round(window_messages * weight / total_weight))
+        forbidden = rng.random() < args.forbidden
+        channels.append(FakeTextChannel(i + 1, f'channel-{i + 1}', recent, http, forbidden))
+
+    statuses = [discord.Status.online, discord.Status.idle, discord.Status.dnd]
+    members = [
+        FakeMember(i + 1, rng.choice(statuses) if rng.random() < args.online else discord.Status.offline)
+        for i in range(args.members)
+    ]
+    return FakeGuild(1, channels, members)
+
+
+async def count_sequential_streaming(guild, since):
+    """Like monitor.count_recent_messages() but without materialising each page."""
+    counts = {}
+    for channel in guild.text_channels:
+        try:
+            count = 0
+            async for _ in channel.history(limit=None, after=since):
+                count += 1
+            counts[channel.id] = count
+        except discord.Forbidden:
+            continue
+    return counts
+
+
+def make_concurrent_strategy(concurrency):
+    async def count_concurrent(guild, since):
+        """Walk channel histories in parallel, bounded by a semaphore."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def count_channel(channel):
+            async with semaphore:
+                count = 0
+                try:
+                    async for _ in channel.history(limit=None, after=since):
+                        count += 1
+                except discord.Forbidden:
+                    return None
+                return channel.id, count
+
+        counts = await asyncio.gather(*(count_channel(c) for c in guild.text_channels))
+        return dict(count for count in counts if count is not None)
+
+    return count_concurrent
+
+
+def collection_strategies(args):
+    return {
+        'sequential': monitor.count_recent_messages,
+        'sequential-streaming': count_sequential_streaming,
+        'concurrent': make_concurrent_strategy(args.concurrency),
+    }
+
+
+async def run_cycle(strategy, http, trace):
+    """Run one update_stats() cycle and return its measurements."""
+    monitor.count_recent_messages = strategy
+    http.reset()
+    if trace:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    await monitor.update_stats()
+    elapsed = time.perf_counter() - started
+
+    result = {'wall_time': elapsed, 'http_calls': http.calls, 'rate_limited': http.rate_limited}
+    if trace:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = after.compare_to(before, 'filename')
+        result['peak_memory'] = peak
+        # Memory blocks the cycle allocated and still holds on to afterwards.
+        result['allocations'] = sum(max(stat.count_diff, 0) for stat in stats)
+    return result
+
+
+def reset_history():
+    """Drop the stored samples, on disk and in memory, so each strategy starts equal."""
+    for path in (monitor.MESSAGES_FILE, monitor.MEMBER_COUNT_FILE, monitor.VOICE_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+    monitor.message_store = monitor.SeriesStore()
+    monitor.member_store = monitor.SeriesStore()
+    monitor.voice_store = monitor.SeriesStore()
+    monitor.stats_api.series.update(
+        members=monitor.member_store, messages=monitor.message_store, voice=monitor.voice_store)
+
+
+async def run_benchmark(args):
+    http = SimulatedHTTP(args.latency_ms / 1000, args.jitter_ms / 1000,
+                         args.rate_limit, args.retry_after_ms / 1000, args.seed)
+    guild = build_guild(args, http)
+    monitor.bot.get_guild = lambda guild_id: guild
+    monitor.commit_to_github = lambda: None
+
+    original = monitor.count_recent_messages
+    strategies = collection_strategies(args)
+    selected = args.strategy or list(strategies)
+    results = {}
+    for name in selected:
+        # Start every strategy from the same amount of stored history.
+        reset_history()
+
+        runs = [await run_cycle(strategies[name], http, trace=False) for _ in range(args.repeat)]
+        traced = await run_cycle(strategies[name], http, trace=True)
+        results[name] = {
+            'wall_time_min': min(r['wall_time'] for r in runs),
+            'wall_time_mean': sum(r['wall_time'] for r in runs) / len(runs),
+            'http_calls': runs[-1]['http_calls'],
+            'rate_limited': sum(r['rate_limited'] for r in runs) / len(runs),
+            'peak_memory': traced['peak_memory'],
+            'allocations': traced['allocations'],
+        }
+    monitor.count_recent_messages = original
+    return results
+
+
+def print_table(results):
+    header = f"{'strategy':<22} {'wall min':>10} {'wall mean':>10} {'http':>7} {'429s':>6} {'peak KiB':>10} {'allocs':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        print(f"{name:<22} {r['wall_time_min']:>9.3f}s {r['wall_time_mean']:>9.3f}s "
+              f"{r['http_calls']:>7} {r['rate_limited']:>6.1f} {r['peak_memory'] / 1024:>10.1f} "
+              f"{r['allocations']:>9}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=50, help='number of text channels')
+    parser.add_argument('--members', type=int, default=5000, help='number of guild members')
+    parser.add_argument('--online', type=float, default=0.15, help='fraction of members online')
+    parser.add_argument('--messages-per-min', type=float, default=60, help='guild-wide message rate')
+    parser.add_argument('--distribution', choices=['uniform', 'zipf', 'burst'], default='zipf',
+                        help='how messages are spread across channels')
+    parser.add_argument('--forbidden', type=float, default=0.0,
+                        help='fraction of channels the bot cannot read')
+    parser.add_argument('--latency-ms', type=float, default=20, help='latency per history request')
+    parser.add_argument('--jitter-ms', type=float, default=5, help='random extra latency per request')
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help='probability that a history request is answered with a 429')
+    parser.add_argument('--retry-after-ms', type=float, default=250, help='retry_after of simulated 429s')
+    parser.add_argument('--concurrency', type=int, default=8, help='parallelism of the concurrent strategy')
+    parser.add_argument('--strategy', action='append', help='only run the named strategy (repeatable)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed cycles per strategy')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', metavar='PATH', help='also write results as JSON to PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    global discord, monitor
+    args = parse_args(argv)
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    # monitor.py reads its configuration at import time and writes bot.log and
+    # data/ relative to the working directory, so import it from a scratch dir.
+    os.environ.setdefault('DISCORD_TOKEN', 'offline-benchmark')
+    os.environ.setdefault('GUILD_ID', '1')
+    sys.path.insert(0, REPO_ROOT)
+    workdir = tempfile.mkdtemp(prefix='monitor-bench-')
+    os.chdir(workdir)
+    import discord
+    import monitor
+    logging.getLogger().setLevel(logging.ERROR)
+
+    unknown = set(args.strategy or []) - set(collection_strategies(args))
+    if unknown:
+        raise SystemExit(f"Unknown strategy: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_benchmark(args))
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
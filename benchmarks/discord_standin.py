@@ -0,0 +1,637 @@
+"""Local stand-in for the subset of the Discord REST and gateway API the monitor uses.
+
+Serves guild fetches with approximate counts, channel message pagination with
+429 rate-limit responses, and a gateway that answers IDENTIFY with READY and
+GUILD_CREATE before replaying a script of PRESENCE_UPDATE and MESSAGE_CREATE
+dispatches. Scripts are seeded, so the same script always produces the same
+sequence of events.
+
+Point the monitor at it through its configuration:
+    python benchmarks/discord_standin.py serve --port 8787 --script script.json
+    DISCORD_API_BASE=http://127.0.0.1:8787/api/v10 \\
+    DISCORD_GATEWAY_URL=ws://127.0.0.1:8787/gateway \\
+    GUILD_ID=1000000000000000001 python monitor.py
+
+Or measure how far discord.py's caches lag behind a burst of dispatches:
+    python benchmarks/discord_standin.py loadtest --members 20000 --presence-rate 5000
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import bisect
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger('discord_standin')
+
+DISCORD_EPOCH_MS = 1420070400000
+API_PREFIX = '/api/v10'
+GUILD_ID = 1000000000000000001
+BOT_USER_ID = 1000000000000000002
+HEARTBEAT_INTERVAL_MS = 41250
+
+DEFAULT_SCRIPT = {
+    'seed': 1234,
+    'guild': {
+        'name': 'Stand-in Guild',
+        'channels': 20,
+        'members': 2000,
+        'online': 0.2,
+        'history_per_channel': 300,
+        'history_span_minutes': 60,
+    },
+    'steps': [
+        {'at': 1.0, 'op': 'presence', 'count': 2000, 'rate': 1000},
+        {'at': 1.0, 'op': 'message', 'count': 200, 'rate': 50},
+        {'at': 5.0, 'op': 'rate_limit', 'count': 3, 'retry_after': 0.5},
+    ],
+}
+
+
+def snowflake(when, increment=0):
+    """Build a Discord snowflake for a datetime."""
+    ms = int(when.timestamp() * 1000)
+    return ((ms - DISCORD_EPOCH_MS) << 22) | (increment & 0xFFF)
+
+
+def iso(when):
+    return when.isoformat()
+
+
+def json_response(data, status=200, headers=None):
+    """JSON response with the bare content type discord.py checks for."""
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    return web.Response(body=json.dumps(data).encode('utf-8'), status=status, headers=headers)
+
+
+def user_payload(user_id, bot=False):
+    return {
+        'id': str(user_id),
+        'username': f'user{user_id % 100000}',
+        'discriminator': '0',
+        'global_name': None,
+        'avatar': None,
+        'bot': bot,
+    }
+
+
+class StandinGuild:
+    """In-memory guild state shared by the REST routes and the gateway."""
+
+    def __init__(self, config, rng):
+        self.rng = rng
+        self.name = config.get('name', 'Stand-in Guild')
+        self.online_fraction = config.get('online', 0.2)
+        now = datetime.now(timezone.utc)
+        self.channel_ids = [GUILD_ID + 100 + i for i in range(config.get('channels', 20))]
+        self.member_ids = [GUILD_ID + 100000 + i for i in range(config.get('members', 2000))]
+        self.statuses = {
+            member_id: ('online' if rng.random() < self.online_fraction else 'offline')
+            for member_id in self.member_ids
+        }
+        self.joined_at = iso(now - timedelta(days=30))
+
+        # Per-channel message ids in ascending order; ids encode their timestamp.
+        self.messages = {}
+        span = timedelta(minutes=config.get('history_span_minutes', 60))
+        per_channel = config.get('history_per_channel', 300)
+        self._increment = 0
+        for channel_id in self.channel_ids:
+            stamps = sorted(now - span * rng.random() for _ in range(per_channel))
+            self.messages[channel_id] = [self._next_id(stamp) for stamp in stamps]
+
+    def _next_id(self, when):
+        self._increment += 1
+        return snowflake(when, self._increment)
+
+    def online_count(self):
+        return sum(1 for status in self.statuses.values() if status != 'offline')
+
+    def add_message(self, channel_id, author_id):
+        message_id = self._next_id(datetime.now(timezone.utc))
+        self.messages[channel_id].append(message_id)
+        return self.message_payload(channel_id, message_id, author_id)
+
+    def message_payload(self, channel_id, message_id, author_id=None):
+        created = datetime.fromtimestamp(((message_id >> 22) + DISCORD_EPOCH_MS) / 1000, timezone.utc)
+        author_id = author_id or self.member_ids[message_id % len(self.member_ids)]
+        return {
+            'id': str(message_id),
+            'channel_id': str(channel_id),
+            'guild_id': str(GUILD_ID),
+            'author': user_payload(author_id),
+            'content': '',
+            'timestamp': iso(created),
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': [],
+            'pinned': False,
+            'type': 0,
+            'flags': 0,
+        }
+
+    def page(self, channel_id, limit, before=None, after=None):
+        """Return one page of messages, newest first, as Discord does."""
+        ids = self.messages[channel_id]
+        if after is not None:
+            start = bisect.bisect_right(ids, after)
+            selected = ids[start:start + limit]
+        else:
+            end = bisect.bisect_left(ids, before) if before is not None else len(ids)
+            selected = ids[max(0, end - limit):end]
+        return [self.message_payload(channel_id, message_id) for message_id in reversed(selected)]
+
+    def channel_payloads(self):
+        return [
+            {
+                'id': str(channel_id),
+                'type': 0,
+                'guild_id': str(GUILD_ID),
+                'name': f'channel-{i + 1}',
+                'position': i,
+                'permission_overwrites': [],
+                'nsfw': False,
+                'parent_id': None,
+            }
+            for i, channel_id in enumerate(self.channel_ids)
+        ]
+
+    def guild_payload(self, with_counts=False):
+        payload = {
+            'id': str(GUILD_ID),
+            'name': self.name,
+            'icon': None,
+            'owner_id': str(BOT_USER_ID),
+            'features': [],
+            'roles': [{
+                'id': str(GUILD_ID),
+                'name': '@everyone',
+                'permissions': str(0x10400),  # VIEW_CHANNEL | READ_MESSAGE_HISTORY
+                'position': 0,
+                'color': 0,
+                'hoist': False,
+                'managed': False,
+                'mentionable': False,
+            }],
+            'emojis': [],
+            'stickers': [],
+            'premium_tier': 0,
+            'verification_level': 0,
+            'default_message_notifications': 0,
+            'explicit_content_filter': 0,
+            'mfa_level': 0,
+            'nsfw_level': 0,
+            'preferred_locale': 'en-US',
+        }
+        if with_counts:
+            payload['approximate_member_count'] = len(self.member_ids)
+            payload['approximate_presence_count'] = self.online_count()
+        return payload
+
+    def guild_create_payload(self):
+        payload = self.guild_payload()
+        payload.update({
+            'unavailable': False,
+            'large': False,
+            'member_count': len(self.member_ids) + 1,
+            'joined_at': self.joined_at,
+            'channels': self.channel_payloads(),
+            'threads': [],
+            'voice_states': [],
+            'stage_instances': [],
+            'guild_scheduled_events': [],
+            'members': [self.member_payload(BOT_USER_ID, bot=True)]
+                       + [self.member_payload(member_id) for member_id in self.member_ids],
+            'presences': [
+                self.presence_payload(member_id)
+                for member_id, status in self.statuses.items() if status != 'offline'
+            ],
+        })
+        return payload
+
+    def member_payload(self, member_id, bot=False):
+        return {
+            'user': user_payload(member_id, bot=bot),
+            'roles': [],
+            'joined_at': self.joined_at,
+            'deaf': False,
+            'mute': False,
+            'flags': 0,
+        }
+
+    def presence_payload(self, member_id):
+        return {
+            'user': {'id': str(member_id)},
+            'guild_id': str(GUILD_ID),
+            'status': self.statuses[member_id],
+            'activities': [],
+            'client_status': {'desktop': self.statuses[member_id]},
+        }
+
+
+class Standin:
+    """aiohttp application implementing the REST routes and the gateway."""
+
+    def __init__(self, script, host='127.0.0.1', port=8787):
+        self.script = script
+        self.host = host
+        self.port = port
+        self.rng = random.Random(script.get('seed', 0))
+        self.guild = StandinGuild(script.get('guild', {}), self.rng)
+        self.sockets = []
+        self.pending_rate_limits = 0
+        self.rate_limit_retry_after = 1.0
+        self.rest_calls = 0
+        self.rate_limited = 0
+        # (kind, object id) -> perf_counter() of the most recent dispatch, for lag measurement.
+        self.sent_at = {}
+        self.dispatched = 0
+        self.replay_done = asyncio.Event()
+        self._replay_task = None
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get(API_PREFIX + '/gateway', self.get_gateway),
+            web.get(API_PREFIX + '/gateway/bot', self.get_gateway_bot),
+            web.get(API_PREFIX + '/users/@me', self.get_current_user),
+            web.get(API_PREFIX + '/oauth2/applications/@me', self.get_application),
+            web.get(API_PREFIX + '/guilds/{guild_id}', self.get_guild),
+            web.get(API_PREFIX + '/channels/{channel_id}/messages', self.get_messages),
+            web.get('/gateway', self.gateway),
+        ])
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def gateway_url(self):
+        return f'ws://{self.host}:{self.port}/gateway'
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Stand-in listening on {self.base_url}{API_PREFIX} and {self.gateway_url}")
+
+    async def stop(self):
+        if self._replay_task:
+            self._replay_task.cancel()
+        for ws in list(self.sockets):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    # REST
+
+    def _json(self, data, status=200, headers=None):
+        headers = dict(headers or {})
+        headers.update({
+            'X-RateLimit-Limit': '50',
+            'X-RateLimit-Remaining': '49',
+            'X-RateLimit-Reset': f'{time.time() + 1:.3f}',
+            'X-RateLimit-Reset-After': '1.000',
+            'X-RateLimit-Bucket': 'standin',
+        })
+        return json_response(data, status=status, headers=headers)
+
+    def _rate_limited(self):
+        self.pending_rate_limits -= 1
+        self.rate_limited += 1
+        retry_after = self.rate_limit_retry_after
+        return json_response(
+            {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': False},
+            status=429,
+            headers={
+                'Retry-After': str(max(1, round(retry_after))),
+                'X-RateLimit-Limit': '50',
+                'X-RateLimit-Remaining': '0',
+                'X-RateLimit-Reset': f'{time.time() + retry_after:.3f}',
+                'X-RateLimit-Reset-After': f'{retry_after:.3f}',
+                'X-RateLimit-Bucket': 'standin',
+                'X-RateLimit-Scope': 'user',
+                # discord.py treats a 429 without Via as a Cloudflare ban.
+                'Via': '1.1 google',
+            },
+        )
+
+    async def get_gateway(self, request):
+        self.rest_calls += 1
+        return self._json({'url': self.gateway_url})
+
+    async def get_gateway_bot(self, request):
+        self.rest_calls += 1
+        return self._json({
+            'url': self.gateway_url,
+            'shards': 1,
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1},
+        })
+
+    async def get_current_user(self, request):
+        self.rest_calls += 1
+        return self._json(user_payload(BOT_USER_ID, bot=True))
+
+    async def get_application(self, request):
+        self.rest_calls += 1
+        return self._json({
+            'id': str(BOT_USER_ID),
+            'name': 'Stand-in Monitor',
+            'icon': None,
+            'description': '',
+            'bot_public': False,
+            'bot_require_code_grant': False,
+            'verify_key': '0' * 64,
+            'owner': user_payload(BOT_USER_ID - 1),
+            'team': None,
+            'flags': 0,
+        })
+
+    async def get_guild(self, request):
+        self.rest_calls += 1
+        if int(request.match_info['guild_id']) != GUILD_ID:
+            return self._json({'message': 'Unknown Guild', 'code': 10004}, status=404)
+        with_counts = request.query.get('with_counts', 'false').lower() == 'true'
+        return self._json(self.guild.guild_payload(with_counts=with_counts))
+
+    async def get_messages(self, request):
+        self.rest_calls += 1
+        if self.pending_rate_limits > 0:
+            return self._rate_limited()
+        channel_id = int(request.match_info['channel_id'])
+        if channel_id not in self.guild.messages:
+            return self._json({'message': 'Unknown Channel', 'code': 10003}, status=404)
+        limit = max(1, min(100, int(request.query.get('limit', 50))))
+        before = request.query.get('before')
+        after = request.query.get('after')
+        page = self.guild.page(
+            channel_id, limit,
+            before=int(before) if before else None,
+            after=int(after) if after else None,
+        )
+        return self._json(page)
+
+    # Gateway
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        session = {'seq': 0, 'session_id': f'standin-{len(self.sockets)}'}
+        await ws.send_json({'op': 10, 'd': {'heartbeat_interval': HEARTBEAT_INTERVAL_MS}})
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(msg.data)
+                op = payload.get('op')
+                if op == 1:
+                    await ws.send_json({'op': 11})
+                elif op == 2:
+                    await self._send_ready(ws, session)
+                elif op == 6:
+                    await self.dispatch_to(ws, session, 'RESUMED', {})
+                elif op == 8:
+                    await self.dispatch_to(ws, session, 'GUILD_MEMBERS_CHUNK', {
+                        'guild_id': str(GUILD_ID),
+                        'members': [self.guild.member_payload(m) for m in self.guild.member_ids],
+                        'chunk_index': 0,
+                        'chunk_count': 1,
+                        'nonce': payload['d'].get('nonce'),
+                    })
+        finally:
+            self.sockets.remove(ws)
+        return ws
+
+    async def dispatch_to(self, ws, session, event, data):
+        session['seq'] += 1
+        await ws.send_str(json.dumps({'op': 0, 's': session['seq'], 't': event, 'd': data}))
+
+    async def _send_ready(self, ws, session):
+        ws.standin_session = session
+        await self.dispatch_to(ws, session, 'READY', {
+            'v': 10,
+            'user': user_payload(BOT_USER_ID, bot=True),
+            'guilds': [{'id': str(GUILD_ID), 'unavailable': True}],
+            'session_id': session['session_id'],
+            'resume_gateway_url': self.gateway_url,
+            'application': {'id': str(BOT_USER_ID), 'flags': 0},
+            'private_channels': [],
+            'relationships': [],
+            'shard': [0, 1],
+        })
+        await self.dispatch_to(ws, session, 'GUILD_CREATE', self.guild.guild_create_payload())
+        if self._replay_task is None:
+            self._replay_task = asyncio.ensure_future(self.replay(self.script.get('steps', [])))
+
+    async def broadcast(self, event, data):
+        for ws in list(self.sockets):
+            session = getattr(ws, 'standin_session', None)
+            if session is not None and not ws.closed:
+                await self.dispatch_to(ws, session, event, data)
+        self.dispatched += 1
+
+    # Script replay
+
+    async def replay(self, steps):
+        """Run the script's steps, each starting `at` seconds after the first READY."""
+        started = time.perf_counter()
+        tasks = []
+        for step in sorted(steps, key=lambda s: s.get('at', 0)):
+            delay = step.get('at', 0) - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self.run_step(step)))
+        await asyncio.gather(*tasks)
+        logger.info(f"Script finished: {self.dispatched} dispatches in {time.perf_counter() - started:.2f}s")
+        self.replay_done.set()
+
+    async def run_step(self, step):
+        op = step['op']
+        if op == 'rate_limit':
+            self.pending_rate_limits += step.get('count', 1)
+            self.rate_limit_retry_after = step.get('retry_after', 1.0)
+            return
+
+        emit = {'presence': self._emit_presence, 'message': self._emit_message}[op]
+        count = step.get('count', 1)
+        rate = step.get('rate', count)
+        # Send in small batches so high rates don't need one timer per event.
+        batch = max(1, int(rate / 100))
+        interval = batch / rate
+        next_at = time.perf_counter()
+        sent = 0
+        while sent < count:
+            for _ in range(min(batch, count - sent)):
+                await emit(step)
+                sent += 1
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            await asyncio.sleep(max(0, delay))
+
+    async def _emit_presence(self, step):
+        member_id = self.rng.choice(self.guild.member_ids)
+        current = self.guild.statuses[member_id]
+        self.guild.statuses[member_id] = 'offline' if current != 'offline' else self.rng.choice(
+            ['online', 'idle', 'dnd'])
+        self.sent_at[('presence', member_id)] = time.perf_counter()
+        await self.broadcast('PRESENCE_UPDATE', self.guild.presence_payload(member_id))
+
+    async def _emit_message(self, step):
+        channel_id = step.get('channel') or self.rng.choice(self.guild.channel_ids)
+        author_id = self.rng.choice(self.guild.member_ids)
+        payload = self.guild.add_message(channel_id, author_id)
+        payload['member'] = {'roles': [], 'joined_at': self.guild.joined_at, 'deaf': False, 'mute': False}
+        self.sent_at[('message', int(payload['id']))] = time.perf_counter()
+        await self.broadcast('MESSAGE_CREATE', payload)
+
+
+def load_script(path):
+    if not path:
+        return json.loads(json.dumps(DEFAULT_SCRIPT))
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+async def serve(args):
+    standin = Standin(load_script(args.script), args.host, args.port)
+    await standin.start()
+    print(f"DISCORD_API_BASE={standin.base_url}{API_PREFIX}")
+    print(f"DISCORD_GATEWAY_URL={standin.gateway_url}")
+    print(f"GUILD_ID={GUILD_ID}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def loadtest(args):
+    """Drive a discord.py client with the monitor's intents and report counter lag."""
+    import discord
+    import yarl
+
+    script = {
+        'seed': args.seed,
+        'guild': {'channels': args.channels, 'members': args.members, 'online': 0.2,
+                  'history_per_channel': 0},
+        'steps': [
+            {'at': 0.5, 'op': 'presence', 'count': int(args.presence_rate * args.duration),
+             'rate': args.presence_rate},
+            {'at': 0.5, 'op': 'message', 'count': int(args.message_rate * args.duration),
+             'rate': args.message_rate},
+        ],
+    }
+    standin = Standin(script, args.host, args.port)
+    await standin.start()
+    discord.http.Route.BASE = standin.base_url + API_PREFIX
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(standin.gateway_url)
+
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    intents.presences = True
+    client = discord.Client(intents=intents)
+    lags = {'presence': [], 'message': []}
+    expected = sum(step['count'] for step in script['steps'])
+
+    @client.event
+    async def on_presence_update(before, after):
+        sent = standin.sent_at.get(('presence', after.id))
+        if sent is not None:
+            lags['presence'].append(time.perf_counter() - sent)
+
+    @client.event
+    async def on_message(message):
+        sent = standin.sent_at.pop(('message', message.id), None)
+        if sent is not None:
+            lags['message'].append(time.perf_counter() - sent)
+
+    started = time.perf_counter()
+    client_task = asyncio.ensure_future(client.start('standin-token'))
+    try:
+        await asyncio.wait_for(standin.replay_done.wait(), timeout=args.duration + 60)
+        # Give the client a moment to drain what is still queued on the socket.
+        deadline = time.perf_counter() + 5
+        while sum(len(v) for v in lags.values()) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        guild = client.get_guild(GUILD_ID)
+        online = sum(1 for m in guild.members if m.status != discord.Status.offline) if guild else 0
+    finally:
+        await client.close()
+        client_task.cancel()
+        await standin.stop()
+    elapsed = time.perf_counter() - started
+
+    results = {
+        'elapsed': elapsed,
+        'dispatched': standin.dispatched,
+        'counter_matches': online == standin.guild.online_count(),
+    }
+    for kind, values in lags.items():
+        results[kind] = {
+            'received': len(values),
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': max(values, default=0.0) * 1000,
+        }
+    print(f"{'dispatch':<10} {'received':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind in ('presence', 'message'):
+        r = results[kind]
+        print(f"{kind:<10} {r['received']:>9} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    print(f"Online counter matches stand-in state: {results['counter_matches']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help='run the stand-in until interrupted')
+    serve_parser.add_argument('--script', help='JSON replay script (defaults to a small built-in one)')
+
+    load_parser = sub.add_parser('loadtest', help='measure end-to-end lag with a discord.py client')
+    load_parser.add_argument('--channels', type=int, default=20)
+    load_parser.add_argument('--members', type=int, default=5000)
+    load_parser.add_argument('--presence-rate', type=float, default=2000, help='presence updates per second')
+    load_parser.add_argument('--message-rate', type=float, default=100, help='messages per second')
+    load_parser.add_argument('--duration', type=float, default=5, help='seconds of traffic to send')
+    load_parser.add_argument('--seed', type=int, default=1234)
+    load_parser.add_argument('--json', metavar='PATH', help='also write results as JSON to PATH')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger('discord').setLevel(logging.WARNING)
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else loadtest(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Per-channel message counts per sample in a compact, bounded layout.
+
+Channels are numbered once in an index (`channels`), and each sample stores only the channels that had messages as two parallel
+integer arrays of channel positions and counts. A sample for a guild with
+hundreds of channels is therefore a few small lists rather than one JSON
+object per channel per tick. Only the newest `max_samples` samples are kept,
+and channels no longer referenced by any kept sample are dropped from the
+index, so the file stays bounded however many channels come and go.
+
+    {"channels": ["1234", ...], "t": [1718431500, 600, ...],
+     "channel": [[0, 3], ...], "count": [[12, 4], ...]}
+
+`t` holds epoch seconds, delta-encoded like the columnar range files, and
+channel IDs are strings so JavaScript can read them without losing precision.
+The file is published, so it holds no channel names; anything shown to users
+refers to channels by ID (Discord renders `<#id>` as the channel).
+"""
+import os
+import json
+import bisect
+import heapq
+import logging
+from collections import deque
+from itertools import islice
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelActivityStore:
+    """Bounded per-channel message series with running totals for top-N queries."""
+
+    def __init__(self, max_samples=1008):
+        self.max_samples = max_samples
+        self.channels = []
+        self.index = {}
+        self.times = deque()
+        self.samples = deque()
+        # Messages per channel position over every kept sample.
+        self.totals = []
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def last_time(self):
+        return self.times[-1] if self.times else None
+
+    def _position(self, channel_id):
+        position = self.index.get(channel_id)
+        if position is None:
+            position = self.index[channel_id] = len(self.channels)
+            self.channels.append(channel_id)
+            self.totals.append(0)
+        return position
+
+    def append(self, ts, counts):
+        """Record one sample; `counts` maps channel ID -> messages."""
+        positions, values = [], []
+        for channel_id, count in sorted(counts.items()):
+            if count:
+                position = self._position(channel_id)
+                positions.append(position)
+                values.append(count)
+                self.totals[position] += count
+        self.times.append(int(ts))
+        self.samples.append((positions, values))
+        while len(self.samples) > self.max_samples:
+            self.times.popleft()
+            for position, count in zip(*self.samples.popleft()):
+                self.totals[position] -= count
+        if len(self.channels) > 2 * max(1, sum(1 for total in self.totals if total)):
+            self._compact()
+
+    def _compact(self):
+        """Renumber the index so it only holds channels some kept sample uses."""
+        keep = [position for position, total in enumerate(self.totals) if total]
+        remap = {old: new for new, old in enumerate(keep)}
+        self.channels = [self.channels[old] for old in keep]
+        self.totals = [self.totals[old] for old in keep]
+        self.index = {channel_id: position for position, channel_id in enumerate(self.channels)}
+        self.samples = deque(
+            ([remap[p] for p in positions], values) for positions, values in self.samples
+        )
+
+    def top(self, n=10, start=None, end=None):
+        """The `n` busiest channels between start and end as (id, messages)."""
+        if start is None and end is None:
+            totals = self.totals
+        else:
+            times = list(self.times)
+            lo = 0 if start is None else bisect.bisect_left(times, start)
+            hi = len(times) if end is None else bisect.bisect_right(times, end)
+            totals = [0] * len(self.channels)
+            for positions, values in islice(self.samples, lo, hi):
+                for position, count in zip(positions, values):
+                    totals[position] += count
+        best = heapq.nlargest(n, (i for i, total in enumerate(totals) if total), key=totals.__getitem__)
+        return [(self.channels[i], totals[i]) for i in best]
+
+    def to_dict(self):
+        deltas, previous = [], 0
+        for ts in self.times:
+            deltas.append(ts - previous)
+            previous = ts
+        return {
+            'channels': [str(channel_id) for channel_id in self.channels],
+            't': deltas,
+            'channel': [positions for positions, _ in self.samples],
+            'count': [values for _, values in self.samples],
+        }
+
+    def save(self, path):
+        write_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path, max_samples=1008):
+        """Load a saved store, or return an empty one if there is none."""
+        store = cls(max_samples)
+        if not os.path.exists(path):
+            return store
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            ids = [int(channel_id) for channel_id in data['channels']]
+            ts = 0
+            for delta, positions, values in zip(data['t'], data['channel'], data['count']):
+                ts += delta
+                store.append(ts, {ids[p]: v for p, v in zip(positions, values)})
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable channel activity file {path}: {e}")
+            return cls(max_samples)
+        return store
@@ -0,0 +1,117 @@
+"""Weekly cohort retention maintained from join and leave events.
+
+Members are grouped by the week (Monday 00:00 UTC) they joined in. Each cohort
+keeps how many joined and a small histogram of how many of them left during
+their first, second, ... week, so "still here after N weeks" is the joined
+count minus the leaves before week N. A join and a leave each update one
+counter; nothing ever iterates over the member list.
+
+Only members of cohorts young enough to still affect a horizon are
+remembered individually (user -> join time), which bounds that map to a few
+weeks of joins.
+"""
+import os
+import json
+import logging
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+WEEK = 7 * 86400
+# 1970-01-05, the first Monday after the epoch
+WEEK_ORIGIN = 4 * 86400
+
+
+def week_start(ts):
+    return int((ts - WEEK_ORIGIN) // WEEK) * WEEK + WEEK_ORIGIN
+
+
+class CohortRetention:
+    """Joined counts and per-week leave histograms for the newest `keep_weeks` cohorts."""
+
+    def __init__(self, horizons=(1, 2, 4), keep_weeks=26):
+        self.horizons = tuple(sorted(horizons))
+        self.keep_weeks = keep_weeks
+        # cohort week start -> {'joined': n, 'left': [leaves in week 0, 1, ..., max horizon - 1]}
+        self.cohorts = {}
+        self.joined_at = {}
+        # Number of member ledger lines already applied
+        self.cursor = 0
+
+    def join(self, ts, user_id):
+        cohort = self._cohort(week_start(ts))
+        cohort['joined'] += 1
+        self.joined_at[user_id] = ts
+
+    def leave(self, ts, user_id):
+        joined = self.joined_at.pop(user_id, None)
+        if joined is None:
+            # Joined before tracking started, or too long ago to matter.
+            return
+        cohort = self.cohorts.get(week_start(joined))
+        if cohort is None:
+            return
+        weeks = int((ts - joined) // WEEK)
+        if weeks < len(cohort['left']):
+            cohort['left'][weeks] += 1
+
+    def _cohort(self, start):
+        cohort = self.cohorts.get(start)
+        if cohort is None:
+            cohort = self.cohorts[start] = {'joined': 0, 'left': [0] * self.horizons[-1]}
+            for old in sorted(self.cohorts)[:-self.keep_weeks]:
+                del self.cohorts[old]
+        return cohort
+
+    def expire(self, now):
+        """Forget individual members whose tenure is past the longest horizon."""
+        cutoff = now - self.horizons[-1] * WEEK
+        for user_id in [user_id for user_id, ts in self.joined_at.items() if ts < cutoff]:
+            del self.joined_at[user_id]
+
+    def table(self, now):
+        """Rows of {cohort, joined, retained: {weeks: count or None}}, oldest first.
+
+        A horizon is None while the cohort is younger than it, because some of
+        its members have not been around that long yet.
+        """
+        rows = []
+        for start in sorted(self.cohorts):
+            cohort = self.cohorts[start]
+            retained = {}
+            for weeks in self.horizons:
+                # The last member of the cohort joined by start + 1 week.
+                if now < start + (weeks + 1) * WEEK:
+                    retained[weeks] = None
+                else:
+                    retained[weeks] = cohort['joined'] - sum(cohort['left'][:weeks])
+            rows.append({'cohort': start, 'joined': cohort['joined'], 'retained': retained})
+        return rows
+
+    def save(self, path):
+        write_json_atomic(path, {
+            'horizons': list(self.horizons),
+            'cohorts': {str(start): cohort for start, cohort in self.cohorts.items()},
+            'joined_at': {str(user_id): ts for user_id, ts in self.joined_at.items()},
+            'cursor': self.cursor,
+        })
+
+    @classmethod
+    def load(cls, path, horizons=(1, 2, 4), keep_weeks=26):
+        """Resume saved state; None if there is none or the horizons changed."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            retention = cls(horizons, keep_weeks)
+            if tuple(data['horizons']) != retention.horizons:
+                return None
+            retention.cohorts = {int(start): cohort for start, cohort in data['cohorts'].items()}
+            retention.joined_at = {int(user_id): ts for user_id, ts in data['joined_at'].items()}
+            retention.cursor = data.get('cursor') or 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable cohort state {path}: {e}")
+            return None
+        return retention
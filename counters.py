@@ -0,0 +1,117 @@
+"""Event counters bucketed by time.
+
+A BucketedCounter keeps, for every time bucket (an hour by default), a small
+dict of named counts such as joins and leaves. Recording an event touches one
+bucket, and totals over any range are sums over the buckets in it, found by
+bisecting the sorted bucket keys. The size depends on the number of buckets,
+not on the number of events or how often the monitor samples.
+
+Saved files are columnar, like the published range files:
+
+    {"bucket_seconds": 3600, "names": ["join", "leave", "net"],
+     "t": [1718431200, 3600, 7200], "join": [3, 0, 1], ...}
+
+where `t` holds delta-encoded bucket start times in epoch seconds.
+"""
+import os
+import json
+import bisect
+import logging
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class BucketedCounter:
+    """Named counts per fixed-size time bucket, optionally keeping only `retention` buckets."""
+
+    def __init__(self, bucket_seconds=3600, retention=None, started=None):
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        # When counting began, if known; the first bucket may start earlier.
+        self.started = started
+        # Number of event log lines these counts are up to date with, if fed from one.
+        self.cursor = 0
+        self.buckets = {}
+        self.keys = []
+        self.names = []
+
+    def add(self, ts, name, count=1):
+        key = int(ts // self.bucket_seconds)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+            if not self.keys or key > self.keys[-1]:
+                self.keys.append(key)
+            else:
+                bisect.insort(self.keys, key)
+            if self.retention and len(self.keys) > self.retention:
+                for old in self.keys[:-self.retention]:
+                    del self.buckets[old]
+                del self.keys[:-self.retention]
+        if name not in self.names:
+            self.names.append(name)
+        bucket[name] = bucket.get(name, 0) + count
+
+    def _range(self, start, end):
+        lo = 0 if start is None else bisect.bisect_left(self.keys, int(start // self.bucket_seconds))
+        hi = len(self.keys) if end is None else bisect.bisect_right(self.keys, int(end // self.bucket_seconds))
+        return self.keys[lo:hi]
+
+    def totals(self, start=None, end=None):
+        """Sum of every name over the buckets overlapping [start, end]."""
+        totals = dict.fromkeys(self.names, 0)
+        for key in self._range(start, end):
+            for name, count in self.buckets[key].items():
+                totals[name] += count
+        return totals
+
+    def series(self, start=None, end=None):
+        """(bucket start time, {name: count}) for every non-empty bucket in range."""
+        return [(key * self.bucket_seconds, self.buckets[key]) for key in self._range(start, end)]
+
+    def to_dict(self):
+        data = {'bucket_seconds': self.bucket_seconds, 'names': self.names, 't': []}
+        if self.started is not None:
+            data['started'] = self.started
+        if self.cursor:
+            data['cursor'] = self.cursor
+        for name in self.names:
+            data[name] = []
+        previous = 0
+        for key in self.keys:
+            start = key * self.bucket_seconds
+            data['t'].append(start - previous)
+            previous = start
+            bucket = self.buckets[key]
+            for name in self.names:
+                data[name].append(bucket.get(name, 0))
+        return data
+
+    def save(self, path):
+        write_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path, bucket_seconds=3600, retention=None):
+        """Load saved counts; None if there is no file or it uses another bucket size."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data['bucket_seconds'] != bucket_seconds:
+                logger.info(f"Bucket size of {path} changed, rebuilding it")
+                return None
+            counter = cls(bucket_seconds, retention, started=data.get('started'))
+            counter.cursor = data.get('cursor', 0)
+            start = 0
+            for i, delta in enumerate(data['t']):
+                start += delta
+                for name in data['names']:
+                    if data[name][i]:
+                        counter.add(start, name, data[name][i])
+        except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable counter file {path}: {e}")
+            return None
+        return counter
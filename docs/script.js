@@ -1,10 +1,75 @@
+// Base URL of the monitor's built-in stats API (see STATS_API_PORT in .env),
+// e.g. 'http://localhost:8080'. Leave empty to load the JSON files from GitHub.
+const STATS_API_BASE = '';
+
+// Upper bound on points per chart requested from the API (LTTB-downsampled).
+const CHART_MAX_POINTS = 1000;
+
+// Published data directory. At every tick the monitor writes one windowed,
+// downsampled file per time range under ranges/ and the newest sample to latest.json.
+const DATA_BASE = 'https://raw.githubusercontent.com/ThatSINEWAVE/Server-Monitor/refs/heads/main/data';
+
+// Fetch the precompressed ranges/<range>.json.gz files (PUBLISH_GZIP in .env)
+// and inflate them in the browser. Only for hosts that serve .gz files as-is.
+const PUBLISHED_GZIP = false;
+
+const LABEL_FORMAT = new Intl.DateTimeFormat('en-US', {
+    month: 'short',
+    day: 'numeric',
+    hour: '2-digit',
+    minute: '2-digit'
+});
+
+// Epoch milliseconds of a stored timestamp; ISO strings without an offset are UTC.
+function parseTimestamp(value) {
+    if (typeof value === 'number') return value * 1000;
+    return Date.parse(/(Z|[+-]\d\d:\d\d)$/.test(value) ? value : `${value}Z`);
+}
+
+// Give each record a numeric `time` once, so sorting, filtering and
+// labelling never parse the date string again.
+function withTimes(records) {
+    for (const record of records) {
+        record.time = parseTimestamp(record.timestamp);
+    }
+    return records;
+}
+
+// Expand a columnar series ({t: [first, delta, ...], field: [...]}) into records.
+function decodeColumns(columns) {
+    const fields = Object.keys(columns).filter(key => key !== 't');
+    const records = new Array(columns.t.length);
+    let seconds = 0;
+    for (let i = 0; i < columns.t.length; i++) {
+        seconds += columns.t[i];
+        const record = { time: seconds * 1000 };
+        for (const field of fields) {
+            // null marks a field this record did not have.
+            if (columns[field][i] !== null) {
+                record[field] = columns[field][i];
+            }
+        }
+        records[i] = record;
+    }
+    return records;
+}
+
+function readSeries(series) {
+    return Array.isArray(series) ? withTimes(series) : decodeColumns(series);
+}
+
 class SinewaveStats {
     constructor() {
         this.memberData = [];
         this.messageData = [];
+        this.latest = null;
+        this.loadedRange = null;
+        // Newest sequence number seen per API series, for delta refreshes.
+        this.lastSeq = { members: null, messages: null };
         this.memberChart = null;
         this.messageChart = null;
         this.autoRefreshInterval = null;
+        this.eventSource = null;
         this.isAutoRefreshEnabled = false;
 
         // Create loading overlay
@@ -24,8 +89,12 @@ class SinewaveStats {
     }
 
     setupEventListeners() {
-        document.getElementById('timeRange').addEventListener('change', () => {
+        document.getElementById('timeRange').addEventListener('change', async () => {
+            // Every range arrives already windowed, so switching fetches it.
+            this.showLoading();
+            await this.loadData();
             this.updateCharts();
+            this.hideLoading();
         });
 
         const refreshBtn = document.getElementById('refreshBtn');
@@ -52,36 +121,121 @@ class SinewaveStats {
 
     async loadData() {
         try {
-            const [memberResponse, messageResponse] = await Promise.all([
-                fetch('https://raw.githubusercontent.com/ThatSINEWAVE/Server-Monitor/refs/heads/main/data/member_count.json'),
-                fetch('https://raw.githubusercontent.com/ThatSINEWAVE/Server-Monitor/refs/heads/main/data/messages.json')
-            ]);
+            if (STATS_API_BASE) {
+                await this.loadFromApi();
+            } else {
+                await this.loadPublishedRange();
+            }
+        } catch (error) {
+            console.error('Error loading data:', error);
+            this.showError('Failed to load server data. Please try again later.');
+        }
+    }
 
-            if (!memberResponse.ok || !messageResponse.ok) {
-                throw new Error('Failed to fetch data');
+    async loadFromApi() {
+        const timeRange = document.getElementById('timeRange').value;
+        if (this.loadedRange === timeRange && this.lastSeq.members !== null && this.lastSeq.messages !== null) {
+            // Same range as before: fetch only what was written since the last refresh.
+            const [memberDelta, messageDelta] = await Promise.all([
+                this.fetchDelta('members'),
+                this.fetchDelta('messages')
+            ]);
+            if (!memberDelta.reset && !messageDelta.reset) {
+                this.mergeDelta(this.memberData, memberDelta.records);
+                this.mergeDelta(this.messageData, messageDelta.records);
+                this.dropExpiredPoints();
+                return;
             }
+        }
 
-            this.memberData = await memberResponse.json();
-            this.messageData = await messageResponse.json();
+        // Ask the API for the selected range only, downsampled to what the
+        // chart can show; it answers 304 when unchanged.
+        let query = `?points=${CHART_MAX_POINTS}`;
+        if (timeRange !== 'all') {
+            query += `&from=${Math.floor(Date.now() / 1000) - parseInt(timeRange) * 3600}`;
+        }
 
-            // Sort data by timestamp
-            this.memberData.sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
-            this.messageData.sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
+        const [memberResponse, messageResponse] = await Promise.all([
+            fetch(`${STATS_API_BASE}/api/members${query}`),
+            fetch(`${STATS_API_BASE}/api/messages${query}`)
+        ]);
 
-        } catch (error) {
-            console.error('Error loading data:', error);
-            this.showError('Failed to load server data. Please try again later.');
+        if (!memberResponse.ok || !messageResponse.ok) {
+            throw new Error('Failed to fetch data');
         }
+
+        this.memberData = withTimes(await memberResponse.json());
+        this.messageData = withTimes(await messageResponse.json());
+        this.lastSeq.members = this.parseSeq(memberResponse);
+        this.lastSeq.messages = this.parseSeq(messageResponse);
+        this.loadedRange = timeRange;
+    }
+
+    parseSeq(response) {
+        const seq = response.headers.get('X-Last-Seq');
+        return seq === null ? null : parseInt(seq);
     }
 
-    filterDataByTimeRange(data) {
+    async fetchDelta(series) {
+        const response = await fetch(`${STATS_API_BASE}/api/${series}?since_seq=${this.lastSeq[series]}`);
+        if (!response.ok) {
+            throw new Error('Failed to fetch data');
+        }
+        const delta = await response.json();
+        this.lastSeq[series] = delta.last_seq;
+        withTimes(delta.records);
+        return delta;
+    }
+
+    mergeDelta(data, records) {
+        // Deltas are newer than anything held, so they go on the end; only a
+        // record older than the last one held (a late write) needs placing.
+        for (const record of records) {
+            let index = data.length;
+            while (index > 0 && data[index - 1].time > record.time) {
+                index--;
+            }
+            // A replayed stream event can repeat a record already held.
+            if (index > 0 && data[index - 1].time === record.time) {
+                continue;
+            }
+            data.splice(index, 0, record);
+        }
+    }
+
+    async loadPublishedRange() {
         const timeRange = document.getElementById('timeRange').value;
-        if (timeRange === 'all') return data;
+        const rangeKey = timeRange === 'all' ? 'all' : `${timeRange}h`;
+
+        // latest.json is tiny; only fetch the range file when it has moved on.
+        const latestResponse = await fetch(`${DATA_BASE}/latest.json`);
+        if (!latestResponse.ok) {
+            throw new Error('Failed to fetch data');
+        }
+        const latest = await latestResponse.json();
+        latest.time = parseTimestamp(latest.timestamp);
+        const unchanged = this.latest && this.latest.timestamp === latest.timestamp;
+        this.latest = latest;
+        if (unchanged && this.loadedRange === rangeKey) {
+            return;
+        }
 
-        const hours = parseInt(timeRange);
-        const cutoffTime = new Date(Date.now() - hours * 60 * 60 * 1000);
+        const range = await this.fetchRange(rangeKey);
+        this.memberData = readSeries(range.members);
+        this.messageData = readSeries(range.messages);
+        this.loadedRange = rangeKey;
+    }
 
-        return data.filter(item => new Date(item.timestamp) >= cutoffTime);
+    async fetchRange(rangeKey) {
+        const gzip = PUBLISHED_GZIP && window.DecompressionStream;
+        const response = await fetch(`${DATA_BASE}/ranges/${rangeKey}.json${gzip ? '.gz' : ''}`);
+        if (!response.ok) {
+            throw new Error('Failed to fetch data');
+        }
+        if (!gzip) {
+            return response.json();
+        }
+        return new Response(response.body.pipeThrough(new DecompressionStream('gzip'))).json();
     }
 
     createCharts() {
@@ -297,53 +451,51 @@ class SinewaveStats {
     }
 
     updateMemberChart() {
-        if (!this.memberChart || !this.memberData.length) return;
-
-        const filteredData = this.filterDataByTimeRange(this.memberData);
-        const labels = filteredData.map(item =>
-            new Date(item.timestamp).toLocaleString('en-US', {
-                month: 'short',
-                day: 'numeric',
-                hour: '2-digit',
-                minute: '2-digit'
-            })
-        );
+        if (!this.memberChart) return;
+
+        const data = this.memberData;
+        const labels = data.map(item => LABEL_FORMAT.format(item.time));
 
         this.memberChart.data.labels = labels;
-        this.memberChart.data.datasets[0].data = filteredData.map(item => item.total_members);
-        this.memberChart.data.datasets[1].data = filteredData.map(item => item.online_members);
+        this.memberChart.data.datasets[0].data = data.map(item => item.total_members);
+        this.memberChart.data.datasets[1].data = data.map(item => item.online_members);
         this.memberChart.update('none');
     }
 
     updateMessageChart() {
-        if (!this.messageChart || !this.messageData.length) return;
-
-        const filteredData = this.filterDataByTimeRange(this.messageData);
-        const labels = filteredData.map(item =>
-            new Date(item.timestamp).toLocaleString('en-US', {
-                month: 'short',
-                day: 'numeric',
-                hour: '2-digit',
-                minute: '2-digit'
-            })
-        );
+        if (!this.messageChart) return;
+
+        const data = this.messageData;
+        const labels = data.map(item => LABEL_FORMAT.format(item.time));
 
         this.messageChart.data.labels = labels;
-        this.messageChart.data.datasets[0].data = filteredData.map(item => item.messages_last_10min);
+        this.messageChart.data.datasets[0].data = data.map(item => item.messages_last_10min);
         this.messageChart.update('none');
     }
 
-    updateStatusBar() {
-        if (!this.memberData.length || !this.messageData.length) return;
+    latestSample() {
+        if (this.latest) return this.latest;
+        if (!this.memberData.length || !this.messageData.length) return null;
 
         const latestMember = this.memberData[this.memberData.length - 1];
         const latestMessage = this.messageData[this.messageData.length - 1];
+        return {
+            time: latestMember.time,
+            total_members: latestMember.total_members,
+            online_members: latestMember.online_members,
+            messages_last_10min: latestMessage.messages_last_10min
+        };
+    }
+
+    updateStatusBar() {
+        const latest = this.latestSample();
+        if (!latest) return;
 
-        document.getElementById('totalMembers').textContent = latestMember.total_members;
-        document.getElementById('onlineMembers').textContent = latestMember.online_members;
-        document.getElementById('recentMessages').textContent = latestMessage.messages_last_10min;
+        document.getElementById('totalMembers').textContent = latest.total_members;
+        document.getElementById('onlineMembers').textContent = latest.online_members;
+        document.getElementById('recentMessages').textContent = latest.messages_last_10min;
 
-        const lastUpdate = new Date(latestMember.timestamp);
+        const lastUpdate = new Date(latest.time);
         document.getElementById('lastUpdated').textContent = lastUpdate.toLocaleTimeString('en-US', {
             hour: '2-digit',
             minute: '2-digit'
@@ -360,17 +512,26 @@ class SinewaveStats {
         const btn = document.getElementById('autoRefresh');
 
         if (this.isAutoRefreshEnabled) {
+            if (this.eventSource) {
+                this.eventSource.close();
+                this.eventSource = null;
+            }
             clearInterval(this.autoRefreshInterval);
             this.isAutoRefreshEnabled = false;
             btn.textContent = 'Enable Auto';
             btn.classList.remove('btn-primary');
             btn.classList.add('btn-secondary');
         } else {
-            this.autoRefreshInterval = setInterval(async () => {
-                await this.loadData();
-                this.updateCharts();
-                this.updateStatusBar();
-            }, 30000); // Refresh every 30 seconds
+            if (STATS_API_BASE && window.EventSource) {
+                // The API pushes each sample as soon as it is recorded.
+                this.startLiveUpdates();
+            } else {
+                this.autoRefreshInterval = setInterval(async () => {
+                    await this.loadData();
+                    this.updateCharts();
+                    this.updateStatusBar();
+                }, 30000); // Refresh every 30 seconds
+            }
 
             this.isAutoRefreshEnabled = true;
             btn.textContent = 'Disable Auto';
@@ -379,6 +540,37 @@ class SinewaveStats {
         }
     }
 
+    startLiveUpdates() {
+        this.eventSource = new EventSource(`${STATS_API_BASE}/api/stream`);
+        this.eventSource.addEventListener('sample', (event) => {
+            const sample = JSON.parse(event.data);
+            this.mergeDelta(this.memberData, withTimes([sample.members]));
+            this.mergeDelta(this.messageData, withTimes([sample.messages]));
+            if (sample.seq) {
+                this.lastSeq.members = sample.seq.members;
+                this.lastSeq.messages = sample.seq.messages;
+            }
+            this.dropExpiredPoints();
+            this.updateCharts();
+            this.updateStatusBar();
+        });
+    }
+
+    dropExpiredPoints() {
+        const timeRange = document.getElementById('timeRange').value;
+        if (timeRange === 'all') return;
+
+        // Data is in time order, so expired points are at the front.
+        const cutoff = Date.now() - parseInt(timeRange) * 60 * 60 * 1000;
+        for (const data of [this.memberData, this.messageData]) {
+            let expired = 0;
+            while (expired < data.length && data[expired].time < cutoff) {
+                expired++;
+            }
+            data.splice(0, expired);
+        }
+    }
+
     showError(message) {
         const container = document.querySelector('.container');
         const errorDiv = document.createElement('div');
@@ -0,0 +1,84 @@
+"""Largest-Triangle-Three-Buckets downsampling for chart-ready series.
+
+LTTB keeps the first and last point and, for every bucket in between, the
+point forming the largest triangle with the previously kept point and the
+average of the next bucket. Unlike averaging or taking every n-th sample it
+preserves spikes, so bursts in `messages_last_10min` stay visible after a long
+history is reduced to a few hundred points.
+"""
+
+
+def value_fields(record):
+    """Names of the numeric fields of a record, excluding its timestamp."""
+    return [
+        key for key, value in record.items()
+        if key != 'timestamp' and isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+def series_fields(records):
+    """Numeric fields of any of `records`, in the order they first appear."""
+    fields = {}
+    for record in records:
+        fields.update(dict.fromkeys(value_fields(record)))
+    return list(fields)
+
+
+def lttb_indices(xs, series, threshold):
+    """Return the indices of the points LTTB keeps.
+
+    `xs` are the x values, `series` a list of y-value lists sharing those x
+    values. Every series is scaled to its own range so that a field with large
+    values (total members) does not drown out a small one (online members).
+    A threshold below 3 leaves no room for a triangle: 2 keeps the first and
+    last point, 1 only the last, and 0 or less means no limit.
+    """
+    n = len(xs)
+    if threshold >= n or threshold <= 0:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][2 - threshold:]
+
+    scales = []
+    for ys in series:
+        span = max(ys) - min(ys)
+        scales.append(1.0 / span if span else 0.0)
+
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle.
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / count
+        avg_ys = [sum(ys[avg_start:avg_end]) / count for ys in series]
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax = xs[a]
+        best_area = -1.0
+        best = range_start
+        for j in range(range_start, range_end):
+            area = 0.0
+            for ys, scale, avg_y in zip(series, scales, avg_ys):
+                ay = ys[a]
+                area += abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay)) * scale
+            if area > best_area:
+                best_area = area
+                best = j
+        kept.append(best)
+        a = best
+
+    kept.append(n - 1)
+    return kept
+
+
+def downsample_records(records, times, threshold, fields=None):
+    """Reduce records (with matching epoch `times`) to at most `threshold` points."""
+    if not threshold or len(records) <= threshold:
+        return records
+    fields = fields or series_fields(records)
+    series = [[record.get(field, 0) for record in records] for field in fields]
+    return [records[i] for i in lttb_indices(times, series, threshold)]
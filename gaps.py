@@ -0,0 +1,111 @@
+"""Detection and backfill of gaps in the bot's gateway connection.
+
+While the bot is disconnected, or not running at all, the event-driven
+collectors see nothing. GapTracker notes when the connection dropped (or,
+after a restart, when the bot was last known to be up) and when it came
+back, and keeps a short history of those gaps.
+
+A gap that ends in `on_resumed` needs no repair: Discord replays the missed
+events on a successful resume. A gap that ends in a fresh session
+(`on_ready`) loses them, so backfill_gap() re-reads just that interval from
+the channels that were active, page by page and with a pause between pages
+so the backfill stays well clear of the rate limits the monitoring loop
+relies on.
+"""
+import os
+import json
+import asyncio
+import logging
+
+import discord
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 100
+
+
+class GapTracker:
+    """Connection gaps, persisted with the last time the bot was known to be up."""
+
+    def __init__(self, path=None, keep=100):
+        self.path = path
+        self.keep = keep
+        self.disconnected_at = None
+        self.last_seen = None
+        self.gaps = []
+        # Set when a backfill finished and its messages are not yet in a sample.
+        self.unsampled_gap = False
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            self.last_seen = state.get('last_seen')
+            self.gaps = state.get('gaps', [])[-self.keep:]
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable gap state {self.path}: {e}")
+            return
+        # Everything since the last time the previous process was seen is a gap.
+        self.disconnected_at = self.last_seen
+
+    def save(self):
+        if not self.path:
+            return
+        write_json_atomic(self.path, {'last_seen': self.last_seen, 'gaps': self.gaps})
+
+    def seen(self, now):
+        """Record that the bot was connected and collecting at `now`."""
+        if self.disconnected_at is None:
+            self.last_seen = now
+
+    def disconnected(self, now):
+        if self.disconnected_at is None:
+            self.disconnected_at = now
+
+    def reconnected(self, now, resumed):
+        """Close the open gap, if any; return it as a dict, or None."""
+        if self.disconnected_at is None:
+            self.last_seen = now
+            return None
+        gap = {'start': self.disconnected_at, 'end': now, 'resumed': resumed, 'backfilled': None}
+        self.disconnected_at = None
+        self.last_seen = now
+        self.gaps.append(gap)
+        del self.gaps[:-self.keep]
+        self.save()
+        return gap
+
+    def backfilled(self, gap, count):
+        """Record that `count` messages of `gap` were recovered from history."""
+        gap['backfilled'] = count
+        self.unsampled_gap = True
+        self.save()
+
+
+async def backfill_gap(channels, start, end, on_message, max_messages=1000, page_pause=1.0):
+    """Feed every message posted in `channels` between start and end to on_message().
+
+    At most `max_messages` are read per channel, and the walk sleeps
+    `page_pause` seconds after every page of history. Returns the number of
+    messages read.
+    """
+    total = 0
+    for channel in channels:
+        count = 0
+        try:
+            async for message in channel.history(limit=max_messages, after=start, before=end, oldest_first=True):
+                on_message(message)
+                count += 1
+                if count % HISTORY_PAGE_SIZE == 0:
+                    await asyncio.sleep(page_pause)
+        except discord.Forbidden:
+            logger.warning(f"No permission to backfill channel: {channel.name}")
+        except discord.HTTPException as e:
+            logger.error(f"Error backfilling {channel.name}: {e}")
+        total += count
+        await asyncio.sleep(page_pause)
+    return total
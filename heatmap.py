@@ -0,0 +1,107 @@
+"""Hour-of-week activity heatmap maintained one sample at a time.
+
+A fixed 7 x N grid (days Monday..Sunday in UTC, N slots per day) accumulates
+the message counts and online members of every sample that falls into each
+cell. Adding a sample touches one cell, and the grid is the same size after a
+week or after a year, so the published file stays tiny and nothing has to be
+recomputed from the history.
+"""
+import os
+import json
+import bisect
+import logging
+from datetime import datetime, timezone
+
+from storage import write_json_atomic
+from series import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+GRIDS = ('samples', 'message_samples', 'messages_sum', 'online_sum', 'online_max')
+
+
+class HourOfWeekHeatmap:
+    """Per-cell sample counts, message sum and online sum/max over the week.
+
+    Average messages per sample in a cell is messages_sum / message_samples,
+    average online members online_sum / samples.
+    """
+
+    def __init__(self, slots_per_day=24):
+        if 1440 % slots_per_day:
+            raise ValueError(f"slots_per_day must divide a day into whole minutes, got {slots_per_day}")
+        self.slots_per_day = slots_per_day
+        self.last_time = None
+        for grid in GRIDS:
+            setattr(self, grid, [[0] * slots_per_day for _ in range(7)])
+
+    def cell(self, ts):
+        moment = datetime.fromtimestamp(ts, timezone.utc)
+        minutes = moment.hour * 60 + moment.minute
+        return moment.weekday(), minutes * self.slots_per_day // 1440
+
+    def add(self, ts, messages=None, online=None):
+        """Fold one sample in; samples at or before the last one added are skipped."""
+        if self.last_time is not None and ts <= self.last_time:
+            return False
+        self.last_time = ts
+        day, slot = self.cell(ts)
+        self.samples[day][slot] += 1
+        if messages is not None:
+            self.message_samples[day][slot] += 1
+            self.messages_sum[day][slot] += messages
+        if online is not None:
+            self.online_sum[day][slot] += online
+            self.online_max[day][slot] = max(self.online_max[day][slot], online)
+        return True
+
+    def add_history(self, member_records, message_records, tolerance=60):
+        """Fold in stored samples, pairing each member record with the message
+        record written closest to it (within `tolerance` seconds)."""
+        message_times = [parse_timestamp(record['timestamp']) for record in message_records]
+        for record in member_records:
+            ts = parse_timestamp(record['timestamp'])
+            index = bisect.bisect_left(message_times, ts)
+            nearest = min((i for i in (index - 1, index) if 0 <= i < len(message_times)),
+                          key=lambda i: abs(message_times[i] - ts), default=None)
+            messages = None
+            if nearest is not None and abs(message_times[nearest] - ts) <= tolerance:
+                messages = message_records[nearest]['messages_last_10min']
+            self.add(ts, messages, record['online_members'])
+
+    def to_dict(self):
+        data = {
+            'timezone': 'UTC',
+            'slots_per_day': self.slots_per_day,
+            'last_time': self.last_time,
+        }
+        for grid in GRIDS:
+            data[grid] = getattr(self, grid)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        heatmap = cls(data['slots_per_day'])
+        heatmap.last_time = data.get('last_time')
+        for grid in GRIDS:
+            setattr(heatmap, grid, data[grid])
+        return heatmap
+
+    def save(self, path):
+        write_json_atomic(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path, slots_per_day=24):
+        """Load a saved heatmap; None if missing, unreadable or of another resolution."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                heatmap = cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable heatmap {path}: {e}")
+            return None
+        if heatmap.slots_per_day != slots_per_day:
+            logger.info(f"Heatmap resolution changed to {slots_per_day} slots per day, rebuilding it")
+            return None
+        return heatmap
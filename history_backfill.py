@@ -0,0 +1,184 @@
+"""Resumable reconstruction of past message activity from channel history.
+
+When the monitor is deployed on an existing server, the activity counters
+start empty. HistoryBackfill walks each text channel's history backwards,
+from the moment live counting began down to `since`, one page at a time, and
+adds every message straight into a BucketedCounter.
+
+Progress is kept per channel as a cursor (the ID of the oldest message read
+so far), advanced in memory after every page:
+
+    {"since": 1710000000, "until": 1718431200,
+     "channels": {"123": {"before": 1250000000000000000, "read": 4200, "done": false}}}
+
+The walk never writes the counter itself. The owner saves the counter and
+then calls save() at the same point, with no await in between, so the saved
+cursors always describe exactly the pages in the saved counts. A restart
+resumes from the last such checkpoint. Only a crash between those two writes
+recounts the pages read since the previous checkpoint.
+
+Channels are walked concurrently, but every page request takes a token from
+a single rate budget shared by all of them, and the walk waits whenever the
+live monitoring cycle is running, so it only ever uses the spare capacity.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import discord
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 100
+
+
+class RateBudget:
+    """Token bucket allowing `rate` acquisitions per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        # Created here so it belongs to the bot's running event loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HistoryBackfill:
+    """Walks channel history back to `since`, counting messages into `counter`."""
+
+    def __init__(self, path, counter, rate=1.0, concurrency=3):
+        self.path = path
+        self.counter = counter
+        self.budget = RateBudget(rate, burst=concurrency)
+        self.concurrency = concurrency
+        self.since = None
+        self.until = None
+        self.channels = {}
+        self.live_running = False
+        self._live_idle = None
+        self._counted = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            self.since = state['since']
+            self.until = state['until']
+            self.channels = {int(channel_id): cursor for channel_id, cursor in state['channels'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable backfill state {self.path}: {e}")
+            self.since = self.until = None
+            self.channels = {}
+
+    def save(self):
+        """Checkpoint the cursors; call right after saving the counter."""
+        if self.since is None:
+            return
+        write_json_atomic(self.path, {
+            'since': self.since,
+            'until': self.until,
+            'channels': {str(channel_id): cursor for channel_id, cursor in self.channels.items()},
+        })
+
+    def plan(self, since, until):
+        """Set the range to reconstruct, keeping any progress already made.
+
+        `until` is fixed by the first plan, so messages already counted live are
+        never counted twice. Moving `since` further back reopens finished
+        channels, which carry on from their cursors.
+        """
+        if self.until is None:
+            self.until = until
+        if self.since is None or since < self.since:
+            for cursor in self.channels.values():
+                cursor['done'] = False
+            self.since = since
+
+    @property
+    def done(self):
+        return bool(self.channels) and all(cursor['done'] for cursor in self.channels.values())
+
+    def pause(self):
+        """Hold further page requests while the live monitoring cycle runs."""
+        self.live_running = True
+        if self._live_idle is not None:
+            self._live_idle.clear()
+
+    def resume(self):
+        self.live_running = False
+        if self._live_idle is not None:
+            self._live_idle.set()
+
+    async def run(self, channels):
+        """Walk every channel in `channels` until it reaches `since`; returns the messages counted."""
+        for channel in channels:
+            self.channels.setdefault(channel.id, {'before': None, 'read': 0, 'done': False})
+        pending = [channel for channel in channels if not self.channels[channel.id]['done']]
+        if not pending:
+            return 0
+        logger.info(f"Backfilling history of {len(pending)} channel(s) back to "
+                    f"{datetime.fromtimestamp(self.since, timezone.utc).isoformat()}")
+        self._live_idle = asyncio.Event()
+        if not self.live_running:
+            self._live_idle.set()
+        queue = asyncio.Queue()
+        for channel in pending:
+            queue.put_nowait(channel)
+        self._counted = 0
+        await asyncio.gather(*(self._worker(queue) for _ in range(min(self.concurrency, len(pending)))))
+        return self._counted
+
+    async def _worker(self, queue):
+        while not queue.empty():
+            channel = queue.get_nowait()
+            try:
+                await self._walk(channel)
+            except discord.Forbidden:
+                logger.warning(f"No permission to backfill channel: {channel.name}")
+                self.channels[channel.id]['done'] = True
+            except Exception as e:
+                # Left unfinished; the next run resumes from its cursor.
+                logger.error(f"Error backfilling {channel.name}: {e}", exc_info=True)
+
+    async def _walk(self, channel):
+        cursor = self.channels[channel.id]
+        after = datetime.fromtimestamp(self.since, timezone.utc)
+        while not cursor['done']:
+            await self._live_idle.wait()
+            await self.budget.acquire()
+            if cursor['before'] is None:
+                before = datetime.fromtimestamp(self.until, timezone.utc)
+            else:
+                before = discord.Object(id=cursor['before'])
+            page = [message async for message in channel.history(
+                limit=HISTORY_PAGE_SIZE, before=before, after=after, oldest_first=False)]
+            for message in page:
+                if not message.author.bot:
+                    self.counter.add(message.created_at.timestamp(), 'messages')
+                    self._counted += 1
+            if page:
+                cursor['before'] = page[-1].id
+                cursor['read'] += len(page)
+            cursor['done'] = len(page) < HISTORY_PAGE_SIZE
+        logger.info(f"Finished backfilling {channel.name}: {cursor['read']} message(s) read")
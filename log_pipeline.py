@@ -0,0 +1,110 @@
+"""Background logging pipeline for the monitor.
+
+Log records are handed to a QueueHandler and written by a QueueListener thread,
+so the event loop never blocks on disk or console I/O. The log file is rotated
+by size or time and rotated files are gzip-compressed. Identical warnings that
+repeat every tick are collapsed into a single line with a suppressed count.
+"""
+import os
+import gzip
+import time
+import queue
+import shutil
+import atexit
+import logging
+import logging.handlers
+from collections import OrderedDict
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def gzip_namer(name):
+    """Name rotated log files with a .gz suffix."""
+    return name + '.gz'
+
+
+def gzip_rotator(source, dest):
+    """Compress the file being rotated out instead of just renaming it."""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class DuplicateFilter(logging.Filter):
+    """Rate-limit identical log messages at or above `level`.
+
+    The first occurrence of a message is logged; repeats within `window`
+    seconds are dropped. The first repeat after the window has passed is logged
+    again with the number of copies that were suppressed in between.
+    """
+
+    def __init__(self, window=3600, level=logging.WARNING, max_keys=1024):
+        super().__init__()
+        self.window = window
+        self.level = level
+        self.max_keys = max_keys
+        # (logger, level, message) -> [first seen, suppressed count]
+        self._seen = OrderedDict()
+
+    def filter(self, record):
+        if record.levelno < self.level or self.window <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            return False
+
+        suppressed = entry[1] if entry is not None else 0
+        self._seen[key] = [now, 0]
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (suppressed {suppressed} repeats in the last {self.window}s)"
+            record.args = None
+        return True
+
+
+def build_file_handler(log_file, max_bytes, backup_count, when):
+    """Create a rotating file handler that gzips the files it rotates out."""
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=when, backupCount=backup_count, utc=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count)
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    return handler
+
+
+def setup_logging(log_file='bot.log', level=logging.INFO, max_bytes=5 * 1024 * 1024,
+                  backup_count=5, when=None, dedup_window=3600):
+    """Route all logging through a queue to a background writer thread.
+
+    Returns the started QueueListener; it is stopped at interpreter exit so
+    queued records are flushed.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(), build_file_handler(log_file, max_bytes, backup_count, when)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(DuplicateFilter(window=dedup_window))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,50 @@
+"""Append-only ledger of member joins and leaves.
+
+Every `on_member_join` / `on_member_remove` becomes one JSON line:
+
+    {"t": 1718431512.4, "event": "join", "user": 123456789012345678}
+
+Lines are only ever appended, so recording an event is a single small write
+and the file can always be replayed to rebuild anything derived from it,
+such as the per-bucket counters or cohort tables. The number of lines is a
+stable position in the ledger: a store saved together with it can later be
+caught up by replaying only the lines after it.
+"""
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOIN = 'join'
+LEAVE = 'leave'
+
+
+class MemberLedger:
+    def __init__(self, path):
+        self.path = path
+        # Lines in the ledger, known once it has been replayed
+        self.lines = 0
+
+    def record(self, ts, event, user_id):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'t': round(ts, 3), 'event': event, 'user': user_id}, separators=(',', ':')) + '\n')
+        self.lines += 1
+
+    def replay(self):
+        """Yield (line number, t, event, user) for every recorded event, skipping damaged lines.
+
+        Afterwards `lines` holds the ledger's length.
+        """
+        self.lines = 0
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for number, line in enumerate(f, 1):
+                self.lines = number
+                try:
+                    entry = json.loads(line)
+                    yield number, entry['t'], entry['event'], entry['user']
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping damaged line {number} of {self.path}")
@@ -1,27 +1,61 @@
 import os
+import io
 import json
+import time
+import signal
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import aiohttp
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import git
+import yarl
 from dotenv import load_dotenv
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('bot.log')
-    ]
-)
-logger = logging.getLogger(__name__)
+from log_pipeline import setup_logging
+from profiling import CycleProfiler
+from series import SeriesStore, parse_timestamp
+from stats_api import StatsAPI
+from rollups import RangeSummaries, parse_range
+from sparkline import RenderCache, render_png
+from anomaly import AnomalyDetector, describe
+from heatmap import HourOfWeekHeatmap
+from channel_activity import ChannelActivityStore
+from sketches import UniqueCounter, WindowedTopK
+from counters import BucketedCounter
+from member_ledger import JOIN, LEAVE, MemberLedger
+from cohorts import CohortRetention
+from voice import VoiceTracker
+from gaps import GapTracker, backfill_gap
+from history_backfill import HistoryBackfill
+from publish import PUBLISH_FORMATS, build_latest, publish_dashboard_artifacts
+from storage import write_json_atomic
 
 # Load environment variables
 load_dotenv()
 
+# Set up logging (written from a background thread, rotated and gzipped)
+LOG_FILE = os.getenv('LOG_FILE', 'bot.log')
+LOG_ROTATE_WHEN = os.getenv('LOG_ROTATE_WHEN')  # e.g. 'midnight'; size-based rotation when unset
+try:
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 5 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    LOG_DEDUP_SECONDS = int(os.getenv('LOG_DEDUP_SECONDS', 3600))
+    setup_logging(
+        log_file=LOG_FILE,
+        level=LOG_LEVEL,
+        max_bytes=LOG_MAX_BYTES,
+        backup_count=LOG_BACKUP_COUNT,
+        when=LOG_ROTATE_WHEN,
+        dedup_window=LOG_DEDUP_SECONDS,
+    )
+except ValueError as e:
+    print(f"Invalid logging configuration: {e}")
+    exit(1)
+logger = logging.getLogger(__name__)
+
 # Configuration
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 if not DISCORD_TOKEN:
@@ -50,10 +84,167 @@ GITHUB_USERNAME = os.getenv('GITHUB_USERNAME')
 GITHUB_REPO = os.getenv('GITHUB_REPO')
 GITHUB_EMAIL = os.getenv('GITHUB_EMAIL')
 
+# On-demand profiling (armed with !profile or SIGUSR1/SIGUSR2, off by default)
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_KEEP = os.getenv('PROFILE_KEEP', '20')
+PROFILE_SIGNAL_CYCLES = os.getenv('PROFILE_SIGNAL_CYCLES', '1')
+try:
+    PROFILE_KEEP = int(PROFILE_KEEP)
+    PROFILE_SIGNAL_CYCLES = int(PROFILE_SIGNAL_CYCLES)
+except ValueError:
+    logger.error(f"Invalid PROFILE_KEEP/PROFILE_SIGNAL_CYCLES: {PROFILE_KEEP}/{PROFILE_SIGNAL_CYCLES}. Must be integers.")
+    exit(1)
+MAX_PROFILE_CYCLES = 50
+
+# Maximum points per series in the published per-range dashboard files
+PUBLISH_MAX_POINTS = os.getenv('PUBLISH_MAX_POINTS', '1000')
+try:
+    PUBLISH_MAX_POINTS = int(PUBLISH_MAX_POINTS)
+except ValueError:
+    logger.error(f"Invalid PUBLISH_MAX_POINTS: {PUBLISH_MAX_POINTS}. Must be an integer.")
+    exit(1)
+# Range file layout ('columnar' or 'records') and whether to add .json.gz copies
+PUBLISH_FORMAT = os.getenv('PUBLISH_FORMAT', 'columnar')
+PUBLISH_GZIP = os.getenv('PUBLISH_GZIP', 'false').lower() in ('1', 'true', 'yes')
+if PUBLISH_FORMAT not in PUBLISH_FORMATS:
+    logger.error(f"Invalid PUBLISH_FORMAT: {PUBLISH_FORMAT}. Must be one of {', '.join(PUBLISH_FORMATS)}.")
+    exit(1)
+
+# Built-in stats API (disabled unless STATS_API_PORT is set)
+STATS_API_HOST = os.getenv('STATS_API_HOST', '127.0.0.1')
+STATS_API_PORT = os.getenv('STATS_API_PORT')
+STATS_API_CORS_ORIGIN = os.getenv('STATS_API_CORS_ORIGIN', '*')
+STATS_API_MAX_VIEWERS = os.getenv('STATS_API_MAX_VIEWERS', '500')
+try:
+    STATS_API_PORT = int(STATS_API_PORT) if STATS_API_PORT else None
+    STATS_API_MAX_VIEWERS = int(STATS_API_MAX_VIEWERS)
+except ValueError:
+    logger.error(f"Invalid STATS_API_PORT/STATS_API_MAX_VIEWERS: {STATS_API_PORT}/{STATS_API_MAX_VIEWERS}. Must be integers.")
+    exit(1)
+
+# Resolution of the published hour-of-week heatmap (24 = hourly, 96 = 15 minutes)
+HEATMAP_SLOTS_PER_DAY = os.getenv('HEATMAP_SLOTS_PER_DAY', '24')
+try:
+    HEATMAP_SLOTS_PER_DAY = int(HEATMAP_SLOTS_PER_DAY)
+    if HEATMAP_SLOTS_PER_DAY <= 0 or 1440 % HEATMAP_SLOTS_PER_DAY:
+        raise ValueError
+except ValueError:
+    logger.error(f"Invalid HEATMAP_SLOTS_PER_DAY: {HEATMAP_SLOTS_PER_DAY}. Must divide 1440 (e.g. 24 or 96).")
+    exit(1)
+
+# Days of per-channel message counts to keep in data/channel_activity.json
+CHANNEL_ACTIVITY_DAYS = os.getenv('CHANNEL_ACTIVITY_DAYS', '7')
+try:
+    CHANNEL_ACTIVITY_DAYS = float(CHANNEL_ACTIVITY_DAYS)
+except ValueError:
+    logger.error(f"Invalid CHANNEL_ACTIVITY_DAYS: {CHANNEL_ACTIVITY_DAYS}. Must be a number.")
+    exit(1)
+
+# Most active posters per window, tracked in a fixed number of sketch slots
+TOP_POSTERS_WINDOW_HOURS = os.getenv('TOP_POSTERS_WINDOW_HOURS', '24')
+TOP_POSTERS_CAPACITY = os.getenv('TOP_POSTERS_CAPACITY', '200')
+try:
+    TOP_POSTERS_WINDOW_HOURS = float(TOP_POSTERS_WINDOW_HOURS)
+    TOP_POSTERS_CAPACITY = int(TOP_POSTERS_CAPACITY)
+    if TOP_POSTERS_WINDOW_HOURS <= 0 or TOP_POSTERS_CAPACITY < 1:
+        raise ValueError
+except ValueError:
+    logger.error(f"Invalid TOP_POSTERS_WINDOW_HOURS/TOP_POSTERS_CAPACITY: {TOP_POSTERS_WINDOW_HOURS}/{TOP_POSTERS_CAPACITY}. "
+                 "Must be a positive number of hours and a capacity of at least 1.")
+    exit(1)
+
+# Days of per-window unique chatter sketches kept for daily/weekly estimates
+UNIQUE_CHATTERS_DAYS = os.getenv('UNIQUE_CHATTERS_DAYS', '7')
+try:
+    UNIQUE_CHATTERS_DAYS = float(UNIQUE_CHATTERS_DAYS)
+except ValueError:
+    logger.error(f"Invalid UNIQUE_CHATTERS_DAYS: {UNIQUE_CHATTERS_DAYS}. Must be a number.")
+    exit(1)
+
+# Backfill of messages missed while the gateway was disconnected
+BACKFILL_MAX_CHANNELS = os.getenv('BACKFILL_MAX_CHANNELS', '20')
+BACKFILL_MAX_MESSAGES = os.getenv('BACKFILL_MAX_MESSAGES', '1000')
+BACKFILL_MAX_GAP_HOURS = os.getenv('BACKFILL_MAX_GAP_HOURS', '6')
+BACKFILL_PAGE_PAUSE = os.getenv('BACKFILL_PAGE_PAUSE', '1')
+try:
+    BACKFILL_MAX_CHANNELS = int(BACKFILL_MAX_CHANNELS)
+    BACKFILL_MAX_MESSAGES = int(BACKFILL_MAX_MESSAGES)
+    BACKFILL_MAX_GAP_HOURS = float(BACKFILL_MAX_GAP_HOURS)
+    BACKFILL_PAGE_PAUSE = float(BACKFILL_PAGE_PAUSE)
+except ValueError:
+    logger.error("Invalid backfill settings: BACKFILL_MAX_CHANNELS and BACKFILL_MAX_MESSAGES must be integers, "
+                 "BACKFILL_MAX_GAP_HOURS and BACKFILL_PAGE_PAUSE numbers.")
+    exit(1)
+
+# Reconstruction of past message activity on first deploy (0 disables it)
+HISTORY_BACKFILL_DAYS = os.getenv('HISTORY_BACKFILL_DAYS', '0')
+HISTORY_BACKFILL_RATE = os.getenv('HISTORY_BACKFILL_RATE', '0.5')
+HISTORY_BACKFILL_CONCURRENCY = os.getenv('HISTORY_BACKFILL_CONCURRENCY', '3')
+try:
+    HISTORY_BACKFILL_DAYS = float(HISTORY_BACKFILL_DAYS)
+    HISTORY_BACKFILL_RATE = float(HISTORY_BACKFILL_RATE)
+    HISTORY_BACKFILL_CONCURRENCY = int(HISTORY_BACKFILL_CONCURRENCY)
+    if HISTORY_BACKFILL_DAYS < 0 or HISTORY_BACKFILL_RATE <= 0 or HISTORY_BACKFILL_CONCURRENCY < 1:
+        raise ValueError
+except ValueError:
+    logger.error("Invalid history backfill settings: HISTORY_BACKFILL_DAYS must be >= 0, "
+                 "HISTORY_BACKFILL_RATE > 0 and HISTORY_BACKFILL_CONCURRENCY a positive integer.")
+    exit(1)
+
+# Cooldowns for !stats and !uptime: one use per user and COMMAND_CHANNEL_RATE
+# uses per channel every COMMAND_COOLDOWN_SECONDS
+COMMAND_COOLDOWN_SECONDS = os.getenv('COMMAND_COOLDOWN_SECONDS', '30')
+COMMAND_CHANNEL_RATE = os.getenv('COMMAND_CHANNEL_RATE', '3')
+try:
+    COMMAND_COOLDOWN_SECONDS = float(COMMAND_COOLDOWN_SECONDS)
+    COMMAND_CHANNEL_RATE = int(COMMAND_CHANNEL_RATE)
+except ValueError:
+    logger.error(f"Invalid COMMAND_COOLDOWN_SECONDS/COMMAND_CHANNEL_RATE: {COMMAND_COOLDOWN_SECONDS}/{COMMAND_CHANNEL_RATE}. Must be numbers.")
+    exit(1)
+
+# Anomaly alerts on message rate and online members (posted to a channel
+# and/or a webhook; only logged when neither is set)
+ALERT_CHANNEL_ID = os.getenv('ALERT_CHANNEL_ID')
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+ANOMALY_Z_THRESHOLD = os.getenv('ANOMALY_Z_THRESHOLD', '4')
+ANOMALY_ALPHA = os.getenv('ANOMALY_ALPHA', '0.1')
+ANOMALY_WARMUP = os.getenv('ANOMALY_WARMUP', '12')
+ALERT_COOLDOWN_MINUTES = os.getenv('ALERT_COOLDOWN_MINUTES', '60')
+try:
+    ALERT_CHANNEL_ID = int(ALERT_CHANNEL_ID) if ALERT_CHANNEL_ID else None
+    ANOMALY_Z_THRESHOLD = float(ANOMALY_Z_THRESHOLD)
+    ANOMALY_ALPHA = float(ANOMALY_ALPHA)
+    ANOMALY_WARMUP = int(ANOMALY_WARMUP)
+    ALERT_COOLDOWN_MINUTES = float(ALERT_COOLDOWN_MINUTES)
+except ValueError:
+    logger.error("Invalid anomaly alert settings: ALERT_CHANNEL_ID and ANOMALY_WARMUP must be integers, "
+                 "ANOMALY_Z_THRESHOLD, ANOMALY_ALPHA and ALERT_COOLDOWN_MINUTES numbers.")
+    exit(1)
+
+# Optional overrides for pointing the bot at a local Discord stand-in
+# (see benchmarks/discord_standin.py). Leave unset to talk to Discord.
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE')
+DISCORD_GATEWAY_URL = os.getenv('DISCORD_GATEWAY_URL')
+
 # File paths
 DATA_DIR = 'data'
 MESSAGES_FILE = os.path.join(DATA_DIR, 'messages.json')
 MEMBER_COUNT_FILE = os.path.join(DATA_DIR, 'member_count.json')
+VOICE_FILE = os.path.join(DATA_DIR, 'voice.json')
+HEATMAP_FILE = os.path.join(DATA_DIR, 'heatmap.json')
+CHANNEL_ACTIVITY_FILE = os.path.join(DATA_DIR, 'channel_activity.json')
+MEMBERSHIP_FILE = os.path.join(DATA_DIR, 'membership.json')
+RETENTION_FILE = os.path.join(DATA_DIR, 'retention.json')
+ACTIVITY_FILE = os.path.join(DATA_DIR, 'activity.json')
+# Private bot state that is kept across restarts but never published
+STATE_DIR = 'state'
+ANOMALY_STATE_FILE = os.path.join(STATE_DIR, 'anomaly.json')
+TOP_POSTERS_STATE_FILE = os.path.join(STATE_DIR, 'top_posters.json')
+UNIQUE_CHATTERS_STATE_FILE = os.path.join(STATE_DIR, 'unique_chatters.json')
+MEMBER_LEDGER_FILE = os.path.join(STATE_DIR, 'member_ledger.jsonl')
+COHORTS_STATE_FILE = os.path.join(STATE_DIR, 'cohorts.json')
+GAPS_STATE_FILE = os.path.join(STATE_DIR, 'gaps.json')
+HISTORY_BACKFILL_STATE_FILE = os.path.join(STATE_DIR, 'history_backfill.json')
 
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -65,6 +256,16 @@ intents.members = True  # Needed for member count tracking
 intents.message_content = True  # Needed for message tracking
 bot = commands.Bot(command_prefix='!', intents=intents)
 
+profiler = CycleProfiler(output_dir=PROFILE_DIR, keep=PROFILE_KEEP)
+start_time = time.time()
+
+if DISCORD_API_BASE:
+    discord.http.Route.BASE = DISCORD_API_BASE.rstrip('/')
+    logger.info(f"Using Discord REST API at: {discord.http.Route.BASE}")
+if DISCORD_GATEWAY_URL:
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(DISCORD_GATEWAY_URL)
+    logger.info(f"Using Discord gateway at: {DISCORD_GATEWAY_URL}")
+
 
 def load_json(file_path):
     """Load JSON data from file or return empty list if file doesn't exist."""
@@ -89,6 +290,97 @@ def save_json(file_path, data):
         logger.error(f"Error saving to {file_path}: {e}")
 
 
+# In-memory copies of the series files; each tick appends here and rewrites
+# the file instead of re-reading the whole history first.
+# Sequence numbers start at the process start in microseconds, above any
+# number an earlier run handed out, so API clients resync after a restart.
+first_seq = time.time_ns() // 1000
+message_store = SeriesStore(load_json(MESSAGES_FILE), first_seq=first_seq)
+member_store = SeriesStore(load_json(MEMBER_COUNT_FILE), first_seq=first_seq)
+voice_store = SeriesStore(load_json(VOICE_FILE), first_seq=first_seq)
+
+stats_api = StatsAPI(
+    {'members': member_store, 'messages': message_store, 'voice': voice_store},
+    host=STATS_API_HOST,
+    port=STATS_API_PORT,
+    cors_origin=STATS_API_CORS_ORIGIN,
+    max_viewers=STATS_API_MAX_VIEWERS,
+)
+# Newest sample, kept in memory so commands never read the data files.
+latest_snapshot = build_latest(member_store, message_store)
+# Hourly rollups behind the /activity and /growth slash commands
+summaries = RangeSummaries(member_store.records, message_store.records)
+slash_commands_synced = False
+# !chart name -> (store, field); rendered PNGs are cached per (name, range, newest sample)
+CHART_SERIES = {
+    'members': (member_store, 'total_members'),
+    'online': (member_store, 'online_members'),
+    'messages': (message_store, 'messages_last_10min'),
+}
+CHART_WIDTH, CHART_HEIGHT = 400, 100
+chart_cache = RenderCache()
+
+anomaly_detector = AnomalyDetector(
+    ['messages_last_10min', 'online_members'],
+    alpha=ANOMALY_ALPHA,
+    threshold=ANOMALY_Z_THRESHOLD,
+    warmup=ANOMALY_WARMUP,
+    cooldown=ALERT_COOLDOWN_MINUTES * 60,
+    path=ANOMALY_STATE_FILE,
+)
+heatmap = HourOfWeekHeatmap.load(HEATMAP_FILE, HEATMAP_SLOTS_PER_DAY)
+if heatmap is None:
+    # Built from the history once; after that every sample only touches one cell.
+    heatmap = HourOfWeekHeatmap(HEATMAP_SLOTS_PER_DAY)
+    heatmap.add_history(member_store.records, message_store.records)
+
+channel_activity = ChannelActivityStore.load(
+    CHANNEL_ACTIVITY_FILE, max_samples=max(1, int(CHANNEL_ACTIVITY_DAYS * 24 * 60 / INTERVAL)))
+
+top_posters = WindowedTopK.load(
+    TOP_POSTERS_STATE_FILE,
+    window_seconds=int(TOP_POSTERS_WINDOW_HOURS * 3600),
+    capacity=TOP_POSTERS_CAPACITY,
+)
+
+unique_chatters = UniqueCounter.load(
+    UNIQUE_CHATTERS_STATE_FILE, retention=max(1, int(UNIQUE_CHATTERS_DAYS * 24 * 60 / INTERVAL)))
+
+# Every join and leave is appended to the ledger and counted per hour
+member_ledger = MemberLedger(MEMBER_LEDGER_FILE)
+membership = BucketedCounter.load(MEMBERSHIP_FILE) or BucketedCounter()
+cohorts = CohortRetention.load(COHORTS_STATE_FILE) or CohortRetention()
+# Catch both stores up with the ledger lines appended after they were last
+# saved; a missing store starts from line 0 and is rebuilt in full.
+for line, ts, event, user_id in member_ledger.replay():
+    if line > membership.cursor:
+        membership.add(ts, event)
+        membership.add(ts, 'net', 1 if event == JOIN else -1)
+    if line > cohorts.cursor:
+        (cohorts.join if event == JOIN else cohorts.leave)(ts, user_id)
+membership.cursor = cohorts.cursor = member_ledger.lines
+
+# The voice-minutes total carries on from the last sample written before a restart
+voice_tracker = VoiceTracker((voice_store.latest or {}).get('voice_minutes_total', 0.0))
+
+# Hourly event counts from messages (including threads), reactions and new threads
+activity = BucketedCounter.load(ACTIVITY_FILE) or BucketedCounter(started=time.time())
+history_backfill = HistoryBackfill(HISTORY_BACKFILL_STATE_FILE, activity,
+                                   rate=HISTORY_BACKFILL_RATE, concurrency=HISTORY_BACKFILL_CONCURRENCY)
+history_backfill.load()
+history_backfill_task = None
+
+# Connection gaps; a restart counts as a gap since the previous process was last seen
+gap_tracker = GapTracker(GAPS_STATE_FILE)
+gap_tracker.load()
+backfill_task = None
+
+if not anomaly_detector.load():
+    # No saved baseline yet: learn one from the recent history already in memory.
+    anomaly_detector.prime('messages_last_10min', [r['messages_last_10min'] for r in message_store.records[-500:]])
+    anomaly_detector.prime('online_members', [r['online_members'] for r in member_store.records[-500:]])
+
+
 def commit_to_github():
     """Commit changes to GitHub repository."""
     try:
@@ -108,8 +400,9 @@ def commit_to_github():
 
         logger.info(f"Preparing to commit {len(changed_files)} files: {changed_files}")
 
-        # Add all changes
+        # Add all changes, including newly published files under data/
         repo.git.add(update=True)
+        repo.git.add(DATA_DIR)
         commit_message = f'Update server stats {datetime.now().isoformat()}'
         repo.index.commit(commit_message)
         logger.info(f"Committed changes with message: '{commit_message}'")
@@ -136,8 +429,33 @@ def commit_to_github():
         logger.error(f"Error committing to GitHub: {str(e)}", exc_info=True)
 
 
+async def count_recent_messages(guild, since):
+    """Count messages posted in each of the guild's text channels after `since`.
+
+    Returns a dict of channel ID -> message count for the readable channels.
+
+    Kept separate from update_stats() so alternative collection strategies
+    can be swapped in (see benchmarks/bench_update_stats.py).
+    """
+    counts = {}
+    for channel in guild.text_channels:
+        try:
+            logger.debug(f"Checking channel: {channel.name}")
+            messages = [msg async for msg in channel.history(limit=None, after=since)]
+            counts[channel.id] = len(messages)
+            logger.debug(f"Found {len(messages)} messages in {channel.name}")
+        except discord.Forbidden:
+            logger.warning(f"No permission to read channel: {channel.name}")
+            continue
+        except Exception as e:
+            logger.error(f"Error counting messages in {channel.name}: {e}", exc_info=True)
+            continue
+    return counts
+
+
 async def update_stats():
     """Update server statistics."""
+    global latest_snapshot
     try:
         guild = bot.get_guild(GUILD_ID)
         if not guild:
@@ -147,23 +465,10 @@ async def update_stats():
         logger.info(f"Updating stats for guild: {guild.name} (ID: {guild.id})")
 
         # Get message count (approximate for last 10 minutes)
-        messages_last_10min = 0
         ten_min_ago = datetime.utcnow() - timedelta(minutes=10)
         logger.info(f"Counting messages since {ten_min_ago.isoformat()}")
-
-        for channel in guild.text_channels:
-            try:
-                logger.debug(f"Checking channel: {channel.name}")
-                messages = [msg async for msg in channel.history(limit=None, after=ten_min_ago)]
-                messages_last_10min += len(messages)
-                logger.debug(f"Found {len(messages)} messages in {channel.name}")
-            except discord.Forbidden:
-                logger.warning(f"No permission to read channel: {channel.name}")
-                continue
-            except Exception as e:
-                logger.error(f"Error counting messages in {channel.name}: {e}", exc_info=True)
-                continue
-
+        channel_counts = await count_recent_messages(guild, ten_min_ago)
+        messages_last_10min = sum(channel_counts.values())
         logger.info(f"Total messages in last 10 minutes: {messages_last_10min}")
 
         # Get member counts
@@ -175,22 +480,111 @@ async def update_stats():
         timestamp = datetime.utcnow().isoformat()
         logger.info(f"Recording stats at timestamp: {timestamp}")
 
+        # Distinct authors seen by on_message since the previous sample
+        chatters = unique_chatters.close(parse_timestamp(timestamp))
+        logger.info(f"Unique chatters since last sample: ~{chatters}")
+
         # Update messages.json
-        messages_data = load_json(MESSAGES_FILE)
-        messages_data.append({
+        message_record = {
             "timestamp": timestamp,
-            "messages_last_10min": messages_last_10min
-        })
-        save_json(MESSAGES_FILE, messages_data)
+            "messages_last_10min": messages_last_10min,
+            "unique_chatters": chatters
+        }
+        if gap_tracker.unsampled_gap:
+            # Messages missed during a gateway gap were read back from history
+            # into these event-driven fields.
+            message_record["reconstructed"] = ["unique_chatters"]
+            gap_tracker.unsampled_gap = False
+        message_store.append(message_record)
+        save_json(MESSAGES_FILE, message_store.records)
 
         # Update member_count.json
-        member_count_data = load_json(MEMBER_COUNT_FILE)
-        member_count_data.append({
+        member_record = {
             "timestamp": timestamp,
             "total_members": total_members,
             "online_members": online_members
-        })
-        save_json(MEMBER_COUNT_FILE, member_count_data)
+        }
+        member_store.append(member_record)
+        save_json(MEMBER_COUNT_FILE, member_store.records)
+
+        # Update voice.json from the event-driven voice counters
+        voice_record = {"timestamp": timestamp, **voice_tracker.sample(time.time())}
+        voice_store.append(voice_record)
+        save_json(VOICE_FILE, voice_store.records)
+        logger.info(f"Voice stats - In voice: {voice_record['in_voice']}, "
+                    f"voice-minutes since last sample: {voice_record['voice_minutes']}")
+
+        try:
+            unique_chatters.save(UNIQUE_CHATTERS_STATE_FILE)
+        except Exception as e:
+            logger.error(f"Error saving unique chatter state: {e}", exc_info=True)
+
+        latest_snapshot = build_latest(member_store, message_store)
+        summaries.record(member_record, message_record)
+        heatmap.add(parse_timestamp(timestamp), messages_last_10min, online_members)
+        channel_activity.append(parse_timestamp(timestamp), channel_counts)
+
+        # Score the sample against the running baseline and alert on outliers
+        anomalies = anomaly_detector.observe({
+            'messages_last_10min': messages_last_10min,
+            'online_members': online_members,
+        }, member_store.last_time)
+        try:
+            anomaly_detector.save()
+        except Exception as e:
+            logger.error(f"Error saving anomaly baselines: {e}", exc_info=True)
+
+        # A restart backfills from last_seen, so the activity counts it pairs
+        # with and the history backfill cursors are saved at the same moment,
+        # with no await in between.
+        try:
+            activity.save(ACTIVITY_FILE)
+            history_backfill.save()
+            gap_tracker.seen(time.time())
+            gap_tracker.save()
+        except Exception as e:
+            logger.error(f"Error saving activity counts and gap state: {e}", exc_info=True)
+
+        # Close the top-poster window even when nobody has posted since it ended
+        try:
+            top_posters.roll(time.time())
+            top_posters.save(TOP_POSTERS_STATE_FILE)
+        except Exception as e:
+            logger.error(f"Error saving top posters: {e}", exc_info=True)
+        for anomaly in anomalies:
+            await send_alert(f"{guild.name}: {describe(anomaly)}")
+
+        # Push the new sample to live dashboard viewers
+        stats_api.publish_sample(members=member_record, messages=message_record, voice=voice_record)
+
+        # Precomputed per-range files and latest.json for the dashboard
+        try:
+            publish_dashboard_artifacts(DATA_DIR, member_store, message_store, PUBLISH_MAX_POINTS,
+                                        fmt=PUBLISH_FORMAT, compress=PUBLISH_GZIP)
+        except Exception as e:
+            logger.error(f"Error publishing dashboard artifacts: {e}", exc_info=True)
+
+        try:
+            heatmap.save(HEATMAP_FILE)
+        except Exception as e:
+            logger.error(f"Error saving activity heatmap: {e}", exc_info=True)
+
+        try:
+            channel_activity.save(CHANNEL_ACTIVITY_FILE)
+        except Exception as e:
+            logger.error(f"Error saving channel activity: {e}", exc_info=True)
+
+        try:
+            membership.save(MEMBERSHIP_FILE)
+        except Exception as e:
+            logger.error(f"Error saving membership counts: {e}", exc_info=True)
+
+        try:
+            cohorts.expire(time.time())
+            cohorts.save(COHORTS_STATE_FILE)
+            write_json_atomic(RETENTION_FILE, cohorts.table(time.time()))
+        except Exception as e:
+            logger.error(f"Error saving cohort retention: {e}", exc_info=True)
 
         # Commit changes to GitHub
         commit_to_github()
@@ -199,11 +593,37 @@ async def update_stats():
         logger.error(f"Error in update_stats: {e}", exc_info=True)
 
 
+async def send_alert(text):
+    """Post an alert to ALERT_CHANNEL_ID and/or ALERT_WEBHOOK_URL."""
+    logger.warning(f"Anomaly: {text}")
+    try:
+        if ALERT_CHANNEL_ID:
+            channel = bot.get_channel(ALERT_CHANNEL_ID)
+            if channel is None:
+                logger.error(f"Alert channel {ALERT_CHANNEL_ID} not found")
+            else:
+                await channel.send(text)
+        if ALERT_WEBHOOK_URL:
+            async with aiohttp.ClientSession() as session:
+                webhook = discord.Webhook.from_url(ALERT_WEBHOOK_URL, session=session)
+                await webhook.send(text, username='Server Monitor')
+    except (discord.HTTPException, aiohttp.ClientError) as e:
+        logger.error(f"Could not send alert: {e}")
+
+
 @tasks.loop(minutes=INTERVAL)
 async def monitor_loop():
     """Main monitoring loop that runs every INTERVAL minutes."""
     logger.info("Starting monitoring cycle")
-    await update_stats()
+    # The history backfill only uses what the live cycle leaves of the rate limits.
+    history_backfill.pause()
+    try:
+        if profiler.armed:
+            await profiler.profile_cycle(update_stats)
+        else:
+            await update_stats()
+    finally:
+        history_backfill.resume()
     logger.info("Monitoring cycle completed")
 
 
@@ -221,7 +641,183 @@ async def on_ready():
     for guild in bot.guilds:
         logger.info(f' - {guild.name} (ID: {guild.id})')
     logger.info('------')
-    monitor_loop.start()  # Start the monitoring loop when bot is ready
+    if STATS_API_PORT and not stats_api.running:
+        try:
+            await stats_api.start()
+        except OSError as e:
+            logger.error(f"Could not start stats API on {STATS_API_HOST}:{STATS_API_PORT}: {e}")
+    await sync_slash_commands()
+    seed_voice_tracker()
+    gap = gap_tracker.reconnected(time.time(), resumed=False)
+    if gap:
+        start_gap_backfill(gap)
+    if HISTORY_BACKFILL_DAYS:
+        start_history_backfill()
+    # on_ready fires again after a full reconnect; the loop must only start once.
+    if not monitor_loop.is_running():
+        monitor_loop.start()  # Start the monitoring loop when bot is ready
+
+
+@bot.event
+async def on_disconnect():
+    gap_tracker.disconnected(time.time())
+
+
+@bot.event
+async def on_resumed():
+    # Discord replays the events missed during a resumed session, so nothing to backfill.
+    gap = gap_tracker.reconnected(time.time(), resumed=True)
+    if gap:
+        logger.info(f"Gateway session resumed after {gap['end'] - gap['start']:.0f}s")
+
+
+def start_gap_backfill(gap):
+    """Re-read the gap from the recently active channels in the background."""
+    global backfill_task
+    if backfill_task is not None and not backfill_task.done():
+        logger.warning("A gap backfill is already running; not starting another")
+        return
+    backfill_task = asyncio.create_task(run_gap_backfill(gap))
+
+
+async def run_gap_backfill(gap):
+    guild = bot.get_guild(GUILD_ID)
+    if guild is None:
+        return
+    start = max(gap['start'], gap['end'] - BACKFILL_MAX_GAP_HOURS * 3600)
+    active = channel_activity.top(BACKFILL_MAX_CHANNELS, start=gap['start'] - 86400)
+    channels = [channel for channel in (guild.get_channel(channel_id) for channel_id, _ in active)
+                if channel is not None]
+    logger.info(f"Backfilling a {gap['end'] - gap['start']:.0f}s gateway gap from {len(channels)} active channel(s)")
+
+    def count_message(message):
+        if message.author.bot:
+            return
+        ts = message.created_at.timestamp()
+        activity.add(ts, 'messages')
+        # The open sample window spans the gap, so its chatters include these authors.
+        unique_chatters.add(message.channel.id, message.author.id)
+        # A top-poster window that already closed keeps its published summary.
+        if top_posters.window_start is None or ts >= top_posters.window_start:
+            top_posters.add(ts, message.author.id)
+
+    try:
+        count = await backfill_gap(
+            channels,
+            datetime.fromtimestamp(start, timezone.utc),
+            datetime.fromtimestamp(gap['end'], timezone.utc),
+            count_message,
+            max_messages=BACKFILL_MAX_MESSAGES,
+            page_pause=BACKFILL_PAGE_PAUSE,
+        )
+        gap_tracker.backfilled(gap, count)
+        logger.info(f"Gap backfill recovered {count} message(s)")
+    except Exception as e:
+        logger.error(f"Gap backfill failed: {e}", exc_info=True)
+
+
+def start_history_backfill():
+    """Resume (or begin) reconstructing HISTORY_BACKFILL_DAYS of message activity."""
+    global history_backfill_task
+    if history_backfill_task is not None and not history_backfill_task.done():
+        return
+    guild = bot.get_guild(GUILD_ID)
+    if guild is None:
+        return
+    # Stop where live counting began so no message is counted twice
+    history_backfill.plan(time.time() - HISTORY_BACKFILL_DAYS * 86400, activity.started)
+    history_backfill_task = asyncio.create_task(run_history_backfill(guild.text_channels))
+
+
+async def run_history_backfill(channels):
+    try:
+        counted = await history_backfill.run(channels)
+        if counted:
+            logger.info(f"History backfill counted {counted} message(s)")
+    except Exception as e:
+        logger.error(f"History backfill failed: {e}", exc_info=True)
+
+
+@bot.listen('on_message')
+async def track_message(message):
+    """Feed every human message in the monitored guild into the event-driven collectors."""
+    if message.author.bot or message.guild is None or message.guild.id != GUILD_ID:
+        return
+    ts = message.created_at.timestamp()
+    top_posters.add(ts, message.author.id)
+    unique_chatters.add(message.channel.id, message.author.id)
+    activity.add(ts, 'messages')
+    if isinstance(message.channel, discord.Thread):
+        # Threads and forum posts are never reached by the text channel history scan.
+        activity.add(ts, 'thread_messages')
+
+
+@bot.listen('on_raw_reaction_add')
+async def track_reaction_add(payload):
+    if payload.guild_id == GUILD_ID:
+        activity.add(time.time(), 'reactions_added')
+
+
+@bot.listen('on_raw_reaction_remove')
+async def track_reaction_remove(payload):
+    if payload.guild_id == GUILD_ID:
+        activity.add(time.time(), 'reactions_removed')
+
+
+@bot.listen('on_thread_create')
+async def track_thread_create(thread):
+    if thread.guild.id != GUILD_ID:
+        return
+    now = time.time()
+    activity.add(now, 'threads_created')
+    if isinstance(thread.parent, discord.ForumChannel):
+        activity.add(now, 'forum_posts')
+
+
+def seed_voice_tracker():
+    """Take the current voice occupancy from the cache; voice events keep it current after this."""
+    guild = bot.get_guild(GUILD_ID)
+    if guild is None:
+        return
+    channels = [*guild.voice_channels, *guild.stage_channels]
+    voice_tracker.seed(time.time(), {
+        channel.id: sum(1 for member in channel.members if not member.bot) for channel in channels
+    })
+    logger.info(f"Voice occupancy seeded: {voice_tracker.in_voice} member(s) in voice")
+
+
+@bot.listen('on_voice_state_update')
+async def track_voice_state(member, before, after):
+    if member.bot or member.guild.id != GUILD_ID:
+        return
+    voice_tracker.move(time.time(), before.channel and before.channel.id, after.channel and after.channel.id)
+
+
+def record_membership_event(member, event):
+    if member.guild.id != GUILD_ID:
+        return
+    now = time.time()
+    try:
+        member_ledger.record(now, event, member.id)
+    except OSError as e:
+        logger.error(f"Could not append to member ledger: {e}")
+    membership.add(now, event)
+    membership.add(now, 'net', 1 if event == JOIN else -1)
+    if event == JOIN:
+        cohorts.join(now, member.id)
+    else:
+        cohorts.leave(now, member.id)
+    membership.cursor = cohorts.cursor = member_ledger.lines
+
+
+@bot.listen('on_member_join')
+async def track_member_join(member):
+    record_membership_event(member, JOIN)
+
+
+@bot.listen('on_member_remove')
+async def track_member_remove(member):
+    record_membership_event(member, LEAVE)
 
 
 @bot.event
@@ -229,11 +825,301 @@ async def on_error(event, *args, **kwargs):
     logger.error(f'Error in event {event}:', exc_info=True)
 
 
+@bot.event
+async def on_command_error(ctx, error):
+    if isinstance(error, (commands.CommandNotFound, commands.CheckFailure, commands.CommandOnCooldown)):
+        logger.debug(f"Ignoring command from {ctx.author}: {error}")
+        return
+    if isinstance(error, (commands.BadArgument, commands.MissingRequiredArgument)):
+        await ctx.send(f"Usage: `{ctx.prefix}{ctx.command.qualified_name} {ctx.command.signature}`")
+        return
+    logger.error(f"Error in command {ctx.command}: {error}", exc_info=error)
+
+
+@bot.command(name='profile')
+@commands.guild_only()
+@commands.has_permissions(administrator=True)
+async def profile_command(ctx, cycles: int = 1, mode: str = 'cpu'):
+    """Profile the next N monitoring cycles. Mode: cpu, memory, both or off."""
+    mode = mode.lower()
+    if mode == 'off':
+        profiler.cancel()
+        await ctx.send("Profiling cancelled.")
+        return
+    if mode not in ('cpu', 'memory', 'both'):
+        await ctx.send("Mode must be one of: cpu, memory, both, off.")
+        return
+
+    cycles = max(1, min(cycles, MAX_PROFILE_CYCLES))
+    profiler.request(cycles, cpu=mode in ('cpu', 'both'), memory=mode in ('memory', 'both'))
+    logger.info(f"{ctx.author} requested {mode} profiling for {cycles} cycle(s)")
+    await ctx.send(f"Profiling the next {cycles} monitoring cycle(s) ({mode}). Output goes to `{PROFILE_DIR}/`.")
+
+
+def command_cooldowns():
+    """Check allowing one use per user and COMMAND_CHANNEL_RATE uses per channel
+    every COMMAND_COOLDOWN_SECONDS. Calls over the limit are dropped silently,
+    since answering them would be spam of its own."""
+    user_buckets = commands.CooldownMapping.from_cooldown(1, COMMAND_COOLDOWN_SECONDS, commands.BucketType.user)
+    channel_buckets = commands.CooldownMapping.from_cooldown(
+        COMMAND_CHANNEL_RATE, COMMAND_COOLDOWN_SECONDS, commands.BucketType.channel)
+
+    async def predicate(ctx):
+        for mapping in (user_buckets, channel_buckets):
+            bucket = mapping.get_bucket(ctx.message)
+            retry_after = bucket.update_rate_limit()
+            if retry_after:
+                raise commands.CommandOnCooldown(bucket, retry_after, mapping.type)
+        return True
+    return commands.check(predicate)
+
+
+def format_duration(seconds):
+    """Render a duration as e.g. '3d 4h 12m'."""
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    parts = [f"{days}d"] if days else []
+    if days or hours:
+        parts.append(f"{hours}h")
+    parts.append(f"{minutes}m")
+    return ' '.join(parts)
+
+
+@bot.command(name='stats')
+@command_cooldowns()
+async def stats_command(ctx):
+    """Show the most recent server statistics."""
+    snapshot = latest_snapshot
+    if snapshot is None:
+        await ctx.send("No statistics recorded yet.")
+        return
+    guild = bot.get_guild(GUILD_ID)
+    name = guild.name if guild else 'Server'
+    # Discord renders <t:...:R> as a relative time in each viewer's locale.
+    recorded = int(parse_timestamp(snapshot['timestamp']))
+    await ctx.send(
+        f"**{name} statistics**\n"
+        f"Members: {snapshot['total_members']} ({snapshot['online_members']} online)\n"
+        f"Messages in the last 10 minutes: {snapshot['messages_last_10min']}\n"
+        f"Recorded <t:{recorded}:R>"
+    )
+
+
+@bot.command(name='uptime')
+@command_cooldowns()
+async def uptime_command(ctx):
+    """Show how long the monitor has been running."""
+    message = f"Monitoring for {format_duration(time.time() - start_time)}"
+    if latest_snapshot is not None:
+        message += f", last sample <t:{int(parse_timestamp(latest_snapshot['timestamp']))}:R>"
+    await ctx.send(message + '.')
+
+
+@bot.command(name='chart')
+@command_cooldowns()
+async def chart_command(ctx, series: str = 'online',
+                        range_: str = commands.parameter(default='24h', displayed_name='range')):
+    """Post a sparkline of members, online or messages over a range such as 24h or 7d."""
+    series = series.lower()
+    if series not in CHART_SERIES:
+        await ctx.send(f"Series must be one of: {', '.join(CHART_SERIES)}.")
+        return
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        await ctx.send(str(e))
+        return
+    store, field = CHART_SERIES[series]
+    if store.last_time is None:
+        await ctx.send("No samples recorded yet.")
+        return
+
+    def render():
+        # The window ends at the newest sample, so the cache key fully describes it.
+        start = None if seconds is None else store.last_time - seconds
+        records = store.query(start, points=CHART_WIDTH)
+        values = [record[field] for record in records]
+        times = [parse_timestamp(record['timestamp']) for record in records]
+        caption = f"**{series.capitalize()} over {range_}**: latest {values[-1]}, low {min(values)}, high {max(values)}"
+        return caption, render_png(values, CHART_WIDTH, CHART_HEIGHT, times=times)
+
+    caption, image = chart_cache.get((series, range_.lower(), store.last_time), render)
+    await ctx.send(caption, file=discord.File(io.BytesIO(image), filename=f'{series}.png'))
+
+
+@bot.command(name='channels')
+@command_cooldowns()
+async def channels_command(ctx, count: int = 5,
+                           range_: str = commands.parameter(default='24h', displayed_name='range')):
+    """List the busiest channels over a range such as 24h or 7d."""
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        await ctx.send(str(e))
+        return
+    # Like !chart, the range ends at the newest sample.
+    last_time = channel_activity.last_time
+    start = None if seconds is None or last_time is None else last_time - seconds
+    top = channel_activity.top(max(1, min(count, 25)), start=start)
+    if not top:
+        await ctx.send(f"No channel activity recorded in the last {range_}.")
+        return
+    lines = [f"{rank}. <#{channel_id}>: {messages:,} messages" for rank, (channel_id, messages) in enumerate(top, 1)]
+    await ctx.send(f"**Busiest channels over {range_}**\n" + '\n'.join(lines))
+
+
+@bot.command(name='topposters')
+@command_cooldowns()
+async def top_posters_command(ctx, count: int = 10):
+    """List the most active posters in the current window."""
+    top = top_posters.sketch.top(max(1, min(count, 25)))
+    if not top:
+        await ctx.send("No messages tracked in the current window yet.")
+        return
+    lines = []
+    for rank, (author_id, messages, error) in enumerate(top, 1):
+        # error is how much of the count the sketch may have inherited from an evicted entry
+        estimate = f"{messages - error:,}-{messages:,}" if error else f"{messages:,}"
+        lines.append(f"{rank}. <@{author_id}>: {estimate} messages")
+    started = int(top_posters.window_start)
+    await ctx.send(f"**Top posters since <t:{started}:f>**\n" + '\n'.join(lines),
+                   allowed_mentions=discord.AllowedMentions.none())
+
+
+@bot.command(name='chatters')
+@command_cooldowns()
+async def chatters_command(ctx):
+    """Estimate how many different members have been chatting recently."""
+    now = time.time()
+    await ctx.send(
+        "**Unique chatters** (estimated)\n"
+        f"Since the last sample: {unique_chatters.estimate(since=now, include_current=True):,}\n"
+        f"Last 24 hours: {unique_chatters.estimate(since=now - 86400):,}\n"
+        f"Last 7 days: {unique_chatters.estimate(since=now - 7 * 86400):,}"
+    )
+
+
+@bot.command(name='retention')
+@command_cooldowns()
+async def retention_command(ctx, weeks: int = 6):
+    """Show how many members of recent weekly join cohorts are still here."""
+    rows = cohorts.table(time.time())[-max(1, min(weeks, 26)):]
+    if not rows:
+        await ctx.send("No joins recorded yet.")
+        return
+
+    def cell(row, horizon):
+        retained = row['retained'][horizon]
+        if retained is None:
+            return 'pending'
+        return f"{retained}/{row['joined']}" if row['joined'] else '-'
+
+    lines = [
+        f"<t:{row['cohort']}:d> ({row['joined']} joined): "
+        + ', '.join(f"{horizon}w {cell(row, horizon)}" for horizon in cohorts.horizons)
+        for row in rows
+    ]
+    await ctx.send("**Retention by join week**\n" + '\n'.join(lines))
+
+
+async def sync_slash_commands():
+    """Register the slash commands with the monitored guild, once per process."""
+    global slash_commands_synced
+    if slash_commands_synced:
+        return
+    try:
+        synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID))
+        slash_commands_synced = True
+        logger.info(f"Synced {len(synced)} slash command(s) to guild {GUILD_ID}")
+    except discord.HTTPException as e:
+        logger.error(f"Could not sync slash commands: {e}")
+
+
+def format_number(value, digits=1):
+    if value is None:
+        return 'n/a'
+    return f"{value:,.{digits}f}" if isinstance(value, float) else f"{value:,}"
+
+
+@bot.tree.command(name='activity', description='Peak online members and message rate over a time range',
+                  guild=discord.Object(id=GUILD_ID))
+@app_commands.describe(range_='Time range, e.g. 24h, 7d, 2w or all')
+@app_commands.rename(range_='range')
+@app_commands.checks.cooldown(1, COMMAND_COOLDOWN_SECONDS)
+async def activity_command(interaction: discord.Interaction, range_: str = '7d'):
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        await interaction.response.send_message(str(e), ephemeral=True)
+        return
+    result = summaries.activity(seconds)
+    if not result['samples']:
+        await interaction.response.send_message(f"No samples recorded in the last {range_}.", ephemeral=True)
+        return
+    events = activity.totals(None if seconds is None else time.time() - seconds)
+    await interaction.response.send_message(
+        f"**Activity over {range_}**\n"
+        f"Peak online: {format_number(result['peak_online'])} (average {format_number(result['average_online'])})\n"
+        f"Messages per 10 minutes: average {format_number(result['average_messages_10min'])}, "
+        f"peak {format_number(result['peak_messages_10min'])}\n"
+        f"Thread messages: {events.get('thread_messages', 0):,}, new threads: {events.get('threads_created', 0):,}, "
+        f"reactions: {events.get('reactions_added', 0):,}"
+    )
+
+
+@bot.tree.command(name='growth', description='Net member change over a time range',
+                  guild=discord.Object(id=GUILD_ID))
+@app_commands.describe(range_='Time range, e.g. 24h, 30d, 2w or all')
+@app_commands.rename(range_='range')
+@app_commands.checks.cooldown(1, COMMAND_COOLDOWN_SECONDS)
+async def growth_command(interaction: discord.Interaction, range_: str = '30d'):
+    try:
+        seconds = parse_range(range_)
+    except ValueError as e:
+        await interaction.response.send_message(str(e), ephemeral=True)
+        return
+    result = summaries.growth(seconds)
+    if not result['samples']:
+        await interaction.response.send_message(f"No samples recorded in the last {range_}.", ephemeral=True)
+        return
+    # Joins and leaves come from the event ledger, so churn between samples shows up too.
+    events = membership.totals(None if seconds is None else time.time() - seconds)
+    await interaction.response.send_message(
+        f"**Member growth over {range_}**\n"
+        f"Net change: {result['net_change']:+,} ({format_number(result['first'])} <t:{int(result['first_time'])}:R> "
+        f"to {format_number(result['last'])} <t:{int(result['last_time'])}:R>)\n"
+        f"Joins: {events.get(JOIN, 0):,}, leaves: {events.get(LEAVE, 0):,}\n"
+        f"Range: {format_number(result['low'])} to {format_number(result['peak'])}"
+    )
+
+
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    if isinstance(error, app_commands.CommandOnCooldown):
+        await interaction.response.send_message(
+            f"Try again in {error.retry_after:.0f} seconds.", ephemeral=True)
+        return
+    logger.error(f"Error in slash command {interaction.command and interaction.command.name}: {error}",
+                 exc_info=error)
+
+
+def install_profiling_signals():
+    """Arm CPU profiling on SIGUSR1 and memory diffs on SIGUSR2 (POSIX only)."""
+    if not hasattr(signal, 'SIGUSR1'):
+        return
+    signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.request(PROFILE_SIGNAL_CYCLES))
+    signal.signal(signal.SIGUSR2, lambda signum, frame: profiler.request(
+        PROFILE_SIGNAL_CYCLES, cpu=False, memory=True))
+
+
 # Run the bot
 if __name__ == '__main__':
     logger.info("Starting bot...")
+    install_profiling_signals()
     try:
-        bot.run(DISCORD_TOKEN)
+        # Our own logging pipeline already handles discord.py's records.
+        bot.run(DISCORD_TOKEN, log_handler=None)
     except discord.LoginFailure:
         logger.error("Invalid Discord token. Please check your DISCORD_TOKEN in .env")
     except Exception as e:
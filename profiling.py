@@ -0,0 +1,127 @@
+"""On-demand profiling of monitoring cycles.
+
+Nothing is profiled until a request arms the profiler (the `!profile` command
+or a signal). While disarmed, the only cost is the `armed` attribute check in
+the monitoring loop.
+"""
+import os
+import io
+import time
+import pstats
+import logging
+import cProfile
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+
+class CycleProfiler:
+    """Profile the next N monitoring cycles with cProfile and/or tracemalloc.
+
+    CPU profiles are written as pstats files; memory profiles are written as
+    text reports of the top allocation differences between consecutive cycles,
+    which is where growth in the member and message caches shows up. Only the
+    newest `keep` files are kept in `output_dir`.
+    """
+
+    def __init__(self, output_dir='profiles', keep=20, top=25):
+        self.output_dir = output_dir
+        self.keep = keep
+        self.top = top
+        self.armed = False
+        self.cpu_cycles = 0
+        self.memory_cycles = 0
+        self._snapshot = None
+        self._started_tracemalloc = False
+        self._sequence = 0
+
+    def request(self, cycles=1, cpu=True, memory=False):
+        """Arm profiling for the next `cycles` monitoring cycles."""
+        if cpu:
+            self.cpu_cycles = max(self.cpu_cycles, cycles)
+        if memory:
+            # One extra cycle is needed to have a baseline to diff against.
+            self.memory_cycles = max(self.memory_cycles, cycles + 1)
+        self.armed = bool(self.cpu_cycles or self.memory_cycles)
+        logger.info(f"Profiling armed: cpu cycles={self.cpu_cycles}, memory cycles={self.memory_cycles}")
+
+    def cancel(self):
+        self.cpu_cycles = 0
+        self.memory_cycles = 0
+        self.armed = False
+        self._stop_tracemalloc()
+        logger.info("Profiling cancelled")
+
+    async def profile_cycle(self, cycle):
+        """Await `cycle()` under whichever profilers are still armed."""
+        self._sequence += 1
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence}"
+        profile = None
+        if self.memory_cycles and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.cpu_cycles:
+            # cProfile sees every task the event loop runs during the cycle,
+            # not just the cycle coroutine itself.
+            profile = cProfile.Profile()
+            profile.enable()
+        try:
+            await cycle()
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._write_cpu_profile(profile, stamp)
+                self.cpu_cycles -= 1
+            if self.memory_cycles:
+                self._write_memory_diff(stamp)
+                self.memory_cycles -= 1
+                if not self.memory_cycles:
+                    self._stop_tracemalloc()
+            self.armed = bool(self.cpu_cycles or self.memory_cycles)
+
+    def _write_cpu_profile(self, profile, stamp):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'cycle-{stamp}.pstats')
+        profile.dump_stats(path)
+        logger.info(f"Wrote CPU profile to {path}")
+        if logger.isEnabledFor(logging.DEBUG):
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(10)
+            logger.debug(summary.getvalue())
+        self._rotate()
+
+    def _write_memory_diff(self, stamp):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        previous, self._snapshot = self._snapshot, snapshot
+        if previous is None:
+            logger.info("Took baseline memory snapshot")
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(previous, 'lineno')
+        lines = [f"Traced memory: current={current} bytes, peak={peak} bytes", '']
+        lines += [str(stat) for stat in stats[:self.top]]
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f'memory-{stamp}.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        growth = sum(stat.size_diff for stat in stats)
+        logger.info(f"Wrote memory diff to {path} (net change {growth:+d} bytes)")
+        self._rotate()
+
+    def _stop_tracemalloc(self):
+        self._snapshot = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _rotate(self):
+        files = sorted(
+            (os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir)),
+            key=os.path.getmtime,
+        )
+        for path in files[:-self.keep] if self.keep > 0 else []:
+            os.remove(path)
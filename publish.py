@@ -0,0 +1,145 @@
+"""Precomputed dashboard artifacts written at publish time.
+
+For every time range the dashboard offers, the monitor writes one small file
+under data/ranges/ that is already windowed, sorted and LTTB-downsampled, plus
+data/latest.json with the newest sample for the status bar. A static host can
+serve these directly and the browser never filters the full history.
+
+Range files are written in a columnar format by default: each series becomes
+parallel arrays of values plus one array of integer epoch seconds, stored as
+the first timestamp followed by the difference to the previous one, e.g.
+
+    {"range": "24h", "format": "columnar",
+     "members": {"t": [1718431500, 600, 600], "total_members": [...], ...},
+     "messages": {"t": [...], "messages_last_10min": [...]}}
+
+so keys are not repeated per record and the dashboard never parses a date
+string. Every field any record has gets a column, holding null where a
+record lacks it, so fields added to newer samples are kept alongside older
+ones. With `gzip=True` a precompressed `<range>.json.gz` sibling is written
+as well.
+
+Run this module directly to rebuild the artifacts from the series files:
+    python publish.py [--format columnar|records] [--gzip]
+"""
+import os
+import json
+import time
+import logging
+
+from series import SeriesStore, parse_timestamp
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+# File name -> window in hours, matching the dashboard's timeRange options.
+DASHBOARD_RANGES = (
+    ('1h', 1),
+    ('6h', 6),
+    ('24h', 24),
+    ('168h', 168),
+    ('720h', 720),
+    ('all', None),
+)
+RANGES_DIR = 'ranges'
+LATEST_FILE = 'latest.json'
+PUBLISH_FORMATS = ('columnar', 'records')
+
+
+def encode_columns(records):
+    """Turn a list of records into parallel arrays with delta-encoded epoch seconds."""
+    columns = {'t': []}
+    previous = 0
+    for record in records:
+        ts = int(parse_timestamp(record['timestamp']))
+        columns['t'].append(ts - previous)
+        previous = ts
+    keys = {}
+    for record in records:
+        keys.update(dict.fromkeys(record))
+    for key in keys:
+        if key != 'timestamp':
+            columns[key] = [record.get(key) for record in records]
+    return columns
+
+
+def decode_columns(columns):
+    """Inverse of encode_columns(): records with `timestamp` as epoch seconds.
+
+    Null values are left out, so a record gets back only the fields it had.
+    """
+    times = []
+    current = 0
+    for delta in columns.get('t', []):
+        current += delta
+        times.append(current)
+    fields = [key for key in columns if key != 't']
+    return [
+        dict({'timestamp': ts}, **{field: columns[field][i] for field in fields if columns[field][i] is not None})
+        for i, ts in enumerate(times)
+    ]
+
+
+def encode_range(store, start, max_points, fmt):
+    records = store.query(start, points=max_points)
+    if fmt == 'records':
+        return records
+    return encode_columns(records)
+
+
+def build_latest(member_store, message_store):
+    """The newest member and message sample merged into one status record."""
+    latest_member = member_store.latest
+    latest_message = message_store.latest
+    if latest_member is None or latest_message is None:
+        return None
+    return {
+        'timestamp': latest_member['timestamp'],
+        'total_members': latest_member['total_members'],
+        'online_members': latest_member['online_members'],
+        'messages_last_10min': latest_message['messages_last_10min'],
+    }
+
+
+def publish_dashboard_artifacts(data_dir, member_store, message_store, max_points=1000, now=None,
+                                fmt='columnar', compress=False):
+    """Write data/ranges/<range>.json for every dashboard range and data/latest.json.
+
+    `fmt` is 'columnar' (see the module docstring) or 'records' for plain
+    lists of records; `compress` also writes a `.json.gz` of every range file.
+    """
+    if fmt not in PUBLISH_FORMATS:
+        raise ValueError(f"Unknown publish format: {fmt}")
+    now = time.time() if now is None else now
+    ranges_dir = os.path.join(data_dir, RANGES_DIR)
+
+    for name, hours in DASHBOARD_RANGES:
+        start = None if hours is None else now - hours * 3600
+        write_json_atomic(os.path.join(ranges_dir, f'{name}.json'), {
+            'range': name,
+            'format': fmt,
+            'members': encode_range(member_store, start, max_points, fmt),
+            'messages': encode_range(message_store, start, max_points, fmt),
+        }, compress=compress)
+
+    latest = build_latest(member_store, message_store)
+    if latest is not None:
+        write_json_atomic(os.path.join(data_dir, LATEST_FILE), latest)
+    logger.info(f"Published dashboard artifacts for {len(DASHBOARD_RANGES)} ranges to {ranges_dir}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rebuild the dashboard artifacts from the series files.')
+    parser.add_argument('--format', choices=PUBLISH_FORMATS, default='columnar')
+    parser.add_argument('--gzip', action='store_true', help='also write .json.gz range files')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    data_dir = 'data'
+    with open(os.path.join(data_dir, 'member_count.json')) as f:
+        members = SeriesStore(json.load(f))
+    with open(os.path.join(data_dir, 'messages.json')) as f:
+        messages = SeriesStore(json.load(f))
+    publish_dashboard_artifacts(data_dir, members, messages, fmt=args.format, compress=args.gzip)
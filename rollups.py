@@ -0,0 +1,176 @@
+"""Rolled-up aggregates of the sample series for historical summaries.
+
+Every sample is folded into a per-bucket (hourly by default) aggregate of each
+numeric field as it is recorded, so summarising a week or a month reads a few
+hundred buckets instead of every stored sample. Range summaries are cached per
+(range, current bucket) until the next sample lands.
+"""
+import re
+import bisect
+import time
+
+from downsample import value_fields
+from series import parse_timestamp
+
+RANGE_PATTERN = re.compile(r'^(\d+)\s*([hdw])$')
+RANGE_UNITS = {'h': 3600, 'd': 86400, 'w': 604800}
+MAX_RANGE_SECONDS = 366 * 86400
+
+
+def parse_range(value):
+    """Parse '24h', '7d', '2w' or 'all' into seconds (None for 'all')."""
+    value = value.strip().lower()
+    if value == 'all':
+        return None
+    match = RANGE_PATTERN.match(value)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid range: {value!r}. Use e.g. 24h, 7d, 2w or all.")
+    seconds = int(match.group(1)) * RANGE_UNITS[match.group(2)]
+    if seconds > MAX_RANGE_SECONDS:
+        raise ValueError(f"Range {value!r} is longer than {MAX_RANGE_SECONDS // 86400} days.")
+    return seconds
+
+
+class FieldAggregate:
+    """count/sum/min/max plus the first and last value (by time) of one field."""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'first', 'first_time', 'last', 'last_time')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.first = self.first_time = None
+        self.last = self.last_time = None
+
+    def add(self, ts, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self.first_time is None or ts < self.first_time:
+            self.first, self.first_time = value, ts
+        if self.last_time is None or ts >= self.last_time:
+            self.last, self.last_time = value, ts
+
+    def merge(self, other):
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        if self.first_time is None or other.first_time < self.first_time:
+            self.first, self.first_time = other.first, other.first_time
+        if self.last_time is None or other.last_time >= self.last_time:
+            self.last, self.last_time = other.last, other.last_time
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class Rollup:
+    """Per-bucket FieldAggregates of a series, keyed by bucket start index."""
+
+    def __init__(self, bucket_seconds=3600):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = {}
+        self.keys = []
+
+    @classmethod
+    def from_records(cls, records, bucket_seconds=3600):
+        rollup = cls(bucket_seconds)
+        for record in records:
+            rollup.add(record)
+        return rollup
+
+    def add(self, record):
+        ts = parse_timestamp(record['timestamp'])
+        key = int(ts // self.bucket_seconds)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+            if not self.keys or key > self.keys[-1]:
+                self.keys.append(key)
+            else:
+                bisect.insort(self.keys, key)
+        for field in value_fields(record):
+            aggregate = bucket.get(field)
+            if aggregate is None:
+                aggregate = bucket[field] = FieldAggregate()
+            aggregate.add(ts, record[field])
+
+    def summarize(self, start=None, end=None):
+        """Merge the buckets overlapping [start, end] into one aggregate per field."""
+        lo = 0 if start is None else bisect.bisect_left(self.keys, int(start // self.bucket_seconds))
+        hi = len(self.keys) if end is None else bisect.bisect_right(self.keys, int(end // self.bucket_seconds))
+        merged = {}
+        for key in self.keys[lo:hi]:
+            for field, aggregate in self.buckets[key].items():
+                merged.setdefault(field, FieldAggregate()).merge(aggregate)
+        return merged
+
+
+class RangeSummaries:
+    """Activity and growth summaries over the member and message series.
+
+    Call `record()` with every new sample; it updates the rollups and drops
+    cached summaries. Summaries are cached per (kind, range, current bucket),
+    so repeated questions within a bucket cost a dictionary lookup.
+    """
+
+    def __init__(self, member_records=(), message_records=(), bucket_seconds=3600):
+        self.bucket_seconds = bucket_seconds
+        self.members = Rollup.from_records(member_records, bucket_seconds)
+        self.messages = Rollup.from_records(message_records, bucket_seconds)
+        self._cache = {}
+
+    def record(self, member_record=None, message_record=None):
+        if member_record is not None:
+            self.members.add(member_record)
+        if message_record is not None:
+            self.messages.add(message_record)
+        self._cache.clear()
+
+    def _cached(self, kind, seconds, now, build):
+        now = time.time() if now is None else now
+        key = (kind, seconds, int(now // self.bucket_seconds))
+        result = self._cache.get(key)
+        if result is None:
+            start = None if seconds is None else now - seconds
+            result = self._cache[key] = build(start, now)
+        return result
+
+    def activity(self, seconds, now=None):
+        """Peak/average online members and message rate over the last `seconds`."""
+        def build(start, end):
+            members = self.members.summarize(start, end)
+            messages = self.messages.summarize(start, end)
+            online = members.get('online_members', FieldAggregate())
+            rate = messages.get('messages_last_10min', FieldAggregate())
+            return {
+                'samples': online.count,
+                'peak_online': online.max,
+                'average_online': online.mean,
+                'peak_messages_10min': rate.max,
+                'average_messages_10min': rate.mean,
+            }
+        return self._cached('activity', seconds, now, build)
+
+    def growth(self, seconds, now=None):
+        """First, last, peak and net change of total members over the last `seconds`."""
+        def build(start, end):
+            total = self.members.summarize(start, end).get('total_members', FieldAggregate())
+            return {
+                'samples': total.count,
+                'first': total.first,
+                'first_time': total.first_time,
+                'last': total.last,
+                'last_time': total.last_time,
+                'peak': total.max,
+                'low': total.min,
+                'net_change': None if total.count == 0 else total.last - total.first,
+            }
+        return self._cached('growth', seconds, now, build)
@@ -0,0 +1,129 @@
+"""In-memory, time-indexed copies of the JSON series files.
+
+The monitor keeps each published series (member counts, message counts) in a
+SeriesStore so a tick only appends to memory and rewrites the file, instead of
+re-reading the whole history first, and so range queries can bisect on a
+sorted list of epoch timestamps rather than scanning every record.
+"""
+import bisect
+from datetime import datetime, timezone
+
+from downsample import downsample_records
+
+
+def parse_timestamp(value):
+    """Convert a stored ISO timestamp (naive UTC) or epoch number to epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class SeriesStore:
+    """Append-only list of sample records kept sorted by timestamp.
+
+    `records` holds the dicts exactly as they are written to disk; `times`
+    holds the matching epoch seconds for bisecting.
+
+    Every record also gets a sequence number when it is written, counting up
+    from `first_seq` in the order records are appended (file order on load).
+    `seqs` holds them alongside `records`, and `last_seq` is the newest one
+    handed out, so clients can ask for "everything after sequence N".
+
+    Sequence numbers are not saved, so they only mean something within one
+    process. Starting each process at a `first_seq` above anything an earlier
+    one handed out (see monitor.py) makes stale numbers recognisable:
+    known_seq() is False for them and clients must resync in full.
+    """
+
+    def __init__(self, records=None, first_seq=1):
+        self.records = []
+        self.times = []
+        self.seqs = []
+        self.first_seq = first_seq
+        self.last_seq = first_seq - 1
+        # Stays True while every record arrived in timestamp order, which makes
+        # `seqs` sorted and lets since_seq() bisect it.
+        self._seqs_sorted = True
+        for record in records or []:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def latest(self):
+        return self.records[-1] if self.records else None
+
+    @property
+    def last_time(self):
+        return self.times[-1] if self.times else None
+
+    def append(self, record):
+        """Add a record, keeping the store ordered by timestamp."""
+        ts = parse_timestamp(record['timestamp'])
+        self.last_seq += 1
+        if not self.times or ts >= self.times[-1]:
+            self.records.append(record)
+            self.times.append(ts)
+            self.seqs.append(self.last_seq)
+        else:
+            index = bisect.bisect_right(self.times, ts)
+            self.records.insert(index, record)
+            self.times.insert(index, ts)
+            self.seqs.insert(index, self.last_seq)
+            self._seqs_sorted = False
+        return self.last_seq
+
+    def known_seq(self, seq):
+        """Whether `seq` was handed out by this store (or is the one before its first)."""
+        return self.first_seq - 1 <= seq <= self.last_seq
+
+    def since_seq(self, seq):
+        """Records appended after sequence number `seq`, in timestamp order."""
+        if self._seqs_sorted:
+            return self.records[bisect.bisect_right(self.seqs, seq):]
+        return [record for record, record_seq in zip(self.records, self.seqs) if record_seq > seq]
+
+    def since_time(self, ts):
+        """Records with a timestamp strictly after epoch seconds `ts`."""
+        return self.records[bisect.bisect_right(self.times, ts):]
+
+    def bounds(self, start=None, end=None):
+        """Return the (lo, hi) slice of records with start <= time <= end."""
+        lo = 0 if start is None else bisect.bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect.bisect_right(self.times, end)
+        return lo, max(lo, hi)
+
+    def query(self, start=None, end=None, step=None, points=None):
+        """Records between start and end; see select() for `step` and `points`."""
+        return self.select(*self.bounds(start, end), step=step, points=points)
+
+    def select(self, lo, hi, step=None, points=None):
+        """Records[lo:hi], thinned to at most one per `step` seconds and then
+        reduced to at most `points` records with LTTB downsampling."""
+        if not step:
+            indices = range(lo, hi)
+        else:
+            # Keep the last record of every step-sized bucket.
+            indices = []
+            bucket = None
+            for i in range(lo, hi):
+                current = int(self.times[i] // step)
+                if current == bucket:
+                    indices[-1] = i
+                else:
+                    indices.append(i)
+                    bucket = current
+
+        if points and len(indices) > points:
+            records = [self.records[i] for i in indices]
+            times = [self.times[i] for i in indices]
+            return downsample_records(records, times, points)
+        if not step:
+            return self.records[lo:hi]
+        return [self.records[i] for i in indices]
@@ -0,0 +1,306 @@
+"""Bounded-memory sketches for per-member activity.
+
+SpaceSaving finds the heaviest hitters of a stream (the most active posters)
+while tracking at most `capacity` keys. It uses the Stream-Summary layout, in
+which keys are grouped by count, so an update is O(1) even when the smallest
+entry has to be evicted. Any key whose true count exceeds n / capacity is
+guaranteed to be tracked, and each reported count overestimates the truth by
+at most its `error`.
+
+HyperLogLog estimates how many distinct keys (chatters) a stream contained
+with about 1.04 / sqrt(2^p) relative error. Sketches of different channels or
+time buckets merge by taking register maxima, so daily or weekly uniques come
+from merging the stored per-window sketches rather than rescanning history.
+Small sketches are kept sparse (only the registers that were set), so a quiet
+window costs a few bytes instead of 2^p.
+"""
+import os
+import json
+import math
+import base64
+import hashlib
+import logging
+from collections import deque
+
+from storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """Top-K counter over an unbounded key space using `capacity` slots."""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # count -> keys with that count (dicts keep insertion order, used as ordered sets)
+        self.buckets = {}
+        self.min_count = 0
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _move(self, key, old, new):
+        if old:
+            bucket = self.buckets[old]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[old]
+                if self.min_count == old:
+                    # With unit steps nothing can lie between old and new.
+                    self.min_count = new if new - old == 1 else min([new, *self.buckets])
+        self.buckets.setdefault(new, {})[key] = None
+        if self.min_count == 0 or new < self.min_count:
+            self.min_count = new
+
+    def add(self, key, weight=1):
+        self.total += weight
+        count = self.counts.get(key)
+        if count is not None:
+            self.counts[key] = count + weight
+            self._move(key, count, count + weight)
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+            self._move(key, 0, weight)
+            return
+        # Evict one of the smallest keys; the newcomer inherits its count as error.
+        floor = self.min_count
+        victim = next(iter(self.buckets[floor]))
+        del self.buckets[floor][victim]
+        if not self.buckets[floor]:
+            del self.buckets[floor]
+            # _move() below lowers min_count to the newcomer if it is smallest.
+            self.min_count = 0 if weight == 1 or not self.buckets else min(self.buckets)
+        del self.counts[victim]
+        del self.errors[victim]
+        self.counts[key] = floor + weight
+        self.errors[key] = floor
+        self._move(key, 0, floor + weight)
+
+    def top(self, k=10):
+        """The k largest entries as (key, count, error), biggest first."""
+        return sorted(
+            ((key, count, self.errors[key]) for key, count in self.counts.items()),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )[:k]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': self.total,
+                'entries': [[str(key), count, self.errors[key]] for key, count in self.counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data, key_type=int):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        for key, count, error in data['entries']:
+            key = key_type(key)
+            sketch.counts[key] = count
+            sketch.errors[key] = error
+            sketch._move(key, 0, count)
+        return sketch
+
+
+class WindowedTopK:
+    """A SpaceSaving sketch per fixed window, rolled over when a window ends.
+
+    Windows are aligned to multiples of `window_seconds` since the epoch. When
+    a window closes, its top `k` entries are kept as a small summary (the most
+    recent `history` of them) and the sketch starts again empty.
+    """
+
+    def __init__(self, window_seconds=86400, capacity=100, k=10, history=30):
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.k = k
+        self.history = history
+        self.window_start = None
+        self.sketch = SpaceSaving(capacity)
+        self.closed = []
+
+    def roll(self, ts):
+        """Close the current window if `ts` lies past its end."""
+        start = int(ts // self.window_seconds) * self.window_seconds
+        if self.window_start is None:
+            self.window_start = start
+        elif start > self.window_start:
+            if self.sketch.total:
+                self.closed.append({
+                    'start': self.window_start,
+                    'end': self.window_start + self.window_seconds,
+                    'total': self.sketch.total,
+                    'top': [[str(key), count, error] for key, count, error in self.sketch.top(self.k)],
+                })
+                del self.closed[:-self.history]
+            self.window_start = start
+            self.sketch = SpaceSaving(self.capacity)
+
+    def add(self, ts, key, weight=1):
+        self.roll(ts)
+        self.sketch.add(key, weight)
+
+    def save(self, path):
+        write_json_atomic(path, {
+            'window_seconds': self.window_seconds,
+            'window_start': self.window_start,
+            'sketch': self.sketch.to_dict(),
+            'closed': self.closed,
+        })
+
+    @classmethod
+    def load(cls, path, window_seconds=86400, capacity=100, k=10, history=30):
+        """Resume from a saved file, or start empty if there is none or the window changed."""
+        windowed = cls(window_seconds, capacity, k, history)
+        if not os.path.exists(path):
+            return windowed
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            windowed.closed = data['closed'][-history:]
+            if data['window_seconds'] == window_seconds:
+                windowed.window_start = data['window_start']
+                windowed.sketch = SpaceSaving.from_dict(data['sketch'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable top-K state {path}: {e}")
+            return cls(window_seconds, capacity, k, history)
+        return windowed
+
+
+class HyperLogLog:
+    """Distinct-count sketch with 2^p registers, sparse until a quarter are set."""
+
+    def __init__(self, p=11):
+        self.p = p
+        self.m = 1 << p
+        self.sparse = {}
+        self.dense = None
+
+    @staticmethod
+    def _hash(key):
+        # A fixed hash, unlike hash(), so sketches saved by one process merge with the next.
+        return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+    def add(self, key):
+        h = self._hash(key)
+        bits = 64 - self.p
+        rest = h & ((1 << bits) - 1)
+        self._set(h >> bits, bits - rest.bit_length() + 1)
+
+    def _set(self, index, rank):
+        if self.dense is not None:
+            if rank > self.dense[index]:
+                self.dense[index] = rank
+        elif rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > self.m // 4:
+                self.dense = bytearray(self.m)
+                for i, r in self.sparse.items():
+                    self.dense[i] = r
+                self.sparse = {}
+
+    def registers(self):
+        """(index, rank) of every register that is set."""
+        if self.dense is None:
+            return self.sparse.items()
+        return ((i, r) for i, r in enumerate(self.dense) if r)
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError(f"Cannot merge HyperLogLogs of precision {self.p} and {other.p}")
+        for index, rank in other.registers():
+            self._set(index, rank)
+        return self
+
+    def count(self):
+        """Estimated number of distinct keys added."""
+        ranks = dict(self.registers())
+        zeros = self.m - len(ranks)
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / (zeros + sum(2.0 ** -r for r in ranks.values()))
+        if estimate <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate while many registers are empty.
+            estimate = self.m * math.log(self.m / zeros)
+        return round(estimate)
+
+    def to_dict(self):
+        if self.dense is None:
+            return {'p': self.p, 'sparse': sorted(self.sparse.items())}
+        return {'p': self.p, 'dense': base64.b64encode(bytes(self.dense)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['p'])
+        if 'dense' in data:
+            sketch.dense = bytearray(base64.b64decode(data['dense']))
+        else:
+            sketch.sparse = {index: rank for index, rank in data['sparse']}
+        return sketch
+
+
+class UniqueCounter:
+    """Distinct authors per sampling window, kept per channel until the window closes.
+
+    `close()` merges the channel sketches of the current window into one,
+    stores it with the window's end time (the newest `retention` windows are
+    kept) and returns its estimate. `estimate(since)` merges the stored
+    windows ending after `since` for daily or weekly figures.
+    """
+
+    def __init__(self, p=11, retention=1008):
+        self.p = p
+        self.retention = retention
+        self.current = {}
+        self.windows = deque()
+
+    def add(self, channel_id, author_id):
+        sketch = self.current.get(channel_id)
+        if sketch is None:
+            sketch = self.current[channel_id] = HyperLogLog(self.p)
+        sketch.add(author_id)
+
+    def close(self, ts):
+        merged = HyperLogLog(self.p)
+        for sketch in self.current.values():
+            merged.merge(sketch)
+        self.current = {}
+        self.windows.append((int(ts), merged))
+        while len(self.windows) > self.retention:
+            self.windows.popleft()
+        return merged.count()
+
+    def estimate(self, since=None, include_current=True):
+        merged = HyperLogLog(self.p)
+        for end, sketch in self.windows:
+            if since is None or end > since:
+                merged.merge(sketch)
+        if include_current:
+            for sketch in self.current.values():
+                merged.merge(sketch)
+        return merged.count()
+
+    def save(self, path):
+        write_json_atomic(path, {
+            'p': self.p,
+            'windows': [[end, sketch.to_dict()] for end, sketch in self.windows],
+        })
+
+    @classmethod
+    def load(cls, path, p=11, retention=1008):
+        """Resume the stored windows, or start empty if there are none or p changed."""
+        counter = cls(p, retention)
+        if not os.path.exists(path):
+            return counter
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data['p'] == p:
+                for end, sketch in data['windows'][-retention:]:
+                    counter.windows.append((end, HyperLogLog.from_dict(sketch)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable unique chatter state {path}: {e}")
+            return cls(p, retention)
+        return counter
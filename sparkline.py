@@ -0,0 +1,107 @@
+"""Small sparkline charts rendered without a plotting library.
+
+`render_png` rasterises a line with a shaded area underneath into an RGB
+buffer and encodes it with zlib, which is all a PNG needs. Series longer than
+the image is wide are reduced with LTTB first, so spikes survive. Renders are cached by whatever key the
+caller passes (series, range and newest sample), so asking again for an
+unchanged chart costs nothing.
+"""
+import zlib
+import struct
+from collections import OrderedDict
+
+from downsample import lttb_indices
+
+DEFAULT_LINE = (88, 101, 242)
+DEFAULT_BACKGROUND = (47, 49, 54)
+
+
+def chart_points(values, width, height, pad=2, times=None):
+    """Map values (and optional x times) to (x, y) pixel positions, y growing downwards."""
+    if times is None:
+        times = list(range(len(values)))
+    if len(values) > width:
+        kept = lttb_indices(times, [values], width)
+        values = [values[i] for i in kept]
+        times = [times[i] for i in kept]
+    low, high = min(values), max(values)
+    span_y = (high - low) or 1
+    span_x = (times[-1] - times[0]) or 1
+    inner_w = width - 1 - 2 * pad
+    inner_h = height - 1 - 2 * pad
+    return [
+        (pad + (t - times[0]) / span_x * inner_w, pad + (1 - (v - low) / span_y) * inner_h)
+        for t, v in zip(times, values)
+    ]
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(pixels, width, height):
+    """Encode a flat bytearray of RGB pixels as a PNG file."""
+    stride = width * 3
+    # Every scanline is prefixed with filter type 0 (none).
+    raw = b''.join(b'\x00' + bytes(pixels[row * stride:(row + 1) * stride]) for row in range(height))
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + _png_chunk(b'IDAT', zlib.compress(raw, 9))
+        + _png_chunk(b'IEND', b'')
+    )
+
+
+def render_png(values, width=300, height=60, times=None, color=DEFAULT_LINE, background=DEFAULT_BACKGROUND):
+    """Return PNG bytes of the series as a 2px line over a shaded area."""
+    pixels = bytearray(bytes(background) * (width * height))
+    if not values:
+        return encode_png(pixels, width, height)
+    fill = bytes((b + c) // 2 for b, c in zip(background, color))
+    line = bytes(color)
+
+    def put(x, y, rgb):
+        if 0 <= x < width and 0 <= y < height:
+            offset = (y * width + x) * 3
+            pixels[offset:offset + 3] = rgb
+
+    # Walk every segment once, remembering the line pixels and the top of the
+    # line in each column for the shading underneath.
+    points = chart_points(values, width, height, times=times)
+    tops = [None] * width
+    trace = []
+    for (x0, y0), (x1, y1) in zip(points, points[1:] or points):
+        steps = max(int(abs(x1 - x0)), int(abs(y1 - y0)), 1)
+        for i in range(steps + 1):
+            x = round(x0 + (x1 - x0) * i / steps)
+            y = round(y0 + (y1 - y0) * i / steps)
+            trace.append((x, y))
+            if 0 <= x < width and (tops[x] is None or y < tops[x]):
+                tops[x] = y
+    for x, top in enumerate(tops):
+        if top is not None:
+            for y in range(top + 1, height):
+                put(x, y, fill)
+    for x, y in trace:
+        put(x, y, line)
+        put(x, y + 1, line)
+    return encode_png(pixels, width, height)
+
+
+class RenderCache:
+    """Least-recently-used cache of rendered images."""
+
+    def __init__(self, size=64):
+        self.size = size
+        self._images = OrderedDict()
+
+    def get(self, key, render):
+        """Return the image for `key`, calling render() only on a miss."""
+        image = self._images.get(key)
+        if image is None:
+            image = self._images[key] = render()
+            while len(self._images) > self.size:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(key)
+        return image
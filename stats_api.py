@@ -0,0 +1,294 @@
+"""Optional HTTP API serving the monitor's series straight from memory.
+
+    GET /api/members?from=&to=&step=&points=
+    GET /api/messages?from=&to=&step=&points=
+
+`from` and `to` accept epoch seconds or ISO 8601 timestamps, `step` thins
+the result to at most one record per that many seconds and `points` caps it
+with LTTB downsampling, which keeps spikes visible. Records have the same
+shape as the published JSON files. Responses carry an ETag and Last-Modified
+so unchanged ranges cost a 304, and bodies are gzip-compressed once and cached
+for every viewer asking for the same range.
+
+    GET /api/members?since_seq=   GET /api/members?since=
+    GET /api/messages?since_seq=  GET /api/messages?since=
+
+Delta sync: `since_seq` is a sequence number, as returned in `last_seq` and
+the X-Last-Seq header; `since` is a time, given like `from` and `to`. The
+reply holds only the records written after it, wrapped as
+`{"last_seq": ..., "reset": ..., "records": [...]}`. `reset` tells the client
+its sequence number is unknown to the server (the monitor restarted, since
+sequence numbers are not saved, or the client fell too far behind) and it
+should reload the full range instead.
+
+    GET /api/stream
+
+Server-Sent Events stream that pushes every new sample as a `sample` event as
+soon as it is recorded. Each sample is encoded once into a shared broadcast
+buffer that all viewers read from, and reconnecting viewers resume from their
+`Last-Event-ID` while it is still in the buffer. Event ids are
+`<epoch>-<n>`, where the epoch identifies the monitor process; a viewer
+reconnecting with an id from an earlier process, or one the server has not
+reached, gets every buffered event again instead of waiting for the
+counter to catch up.
+"""
+import gzip
+import json
+import math
+import time
+import asyncio
+import logging
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from series import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+BODY_CACHE_SIZE = 128
+MAX_POINTS = 5000
+STREAM_KEEPALIVE_SECONDS = 25
+
+
+def parse_time_param(value):
+    """Parse a from/to query value given as epoch seconds or an ISO timestamp."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return parse_timestamp(value)
+
+
+class Broadcaster:
+    """Fan-out buffer of pre-encoded SSE events shared by every viewer.
+
+    Publishing encodes an event once and appends it to a bounded ring buffer;
+    viewers remember the last event id they sent and copy anything newer, so
+    there is no per-viewer queue to grow when a viewer is slow.
+    """
+
+    def __init__(self, size=256):
+        self.buffer = deque(maxlen=size)
+        self.epoch = int(time.time())
+        self.last_id = 0
+        # Created by the first waiter so it belongs to the running event loop.
+        self._published = None
+
+    def publish(self, event, data):
+        self.last_id += 1
+        payload = (f"id: {self.epoch}-{self.last_id}\nevent: {event}\n"
+                   f"data: {json.dumps(data, separators=(',', ':'))}\n\n")
+        self.buffer.append((self.last_id, payload.encode('utf-8')))
+        # Wake everyone waiting on the current event; the next waiter makes a fresh one.
+        if self._published is not None:
+            self._published.set()
+            self._published = None
+
+    def resume_from(self, header):
+        """The event counter to resume after, given a viewer's Last-Event-ID header.
+
+        A viewer with no id starts with the next event. An id from another
+        process or from beyond the current counter (the monitor restarted)
+        replays the whole buffer.
+        """
+        if not header:
+            return self.last_id
+        epoch, _, counter = header.partition('-')
+        try:
+            epoch, counter = int(epoch), int(counter)
+        except ValueError:
+            return 0
+        if epoch != self.epoch or counter > self.last_id:
+            return 0
+        return counter
+
+    def since(self, last_id):
+        """Encoded events newer than `last_id` that are still buffered."""
+        return [(event_id, payload) for event_id, payload in self.buffer if event_id > last_id]
+
+    async def wait(self, last_id, timeout):
+        """Wait until an event newer than `last_id` exists; False on timeout."""
+        if self.last_id > last_id:
+            return True
+        if self._published is None:
+            self._published = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._published.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class StatsAPI:
+    """aiohttp server answering range queries from SeriesStore objects."""
+
+    def __init__(self, series, host='127.0.0.1', port=8080, cors_origin='*', max_viewers=500):
+        self.series = series
+        self.host = host
+        self.port = port
+        self.cors_origin = cors_origin
+        self.max_viewers = max_viewers
+        self.viewers = 0
+        self.broadcaster = Broadcaster()
+        self.app = web.Application()
+        self.app.router.add_get('/api/stream', self.handle_stream)
+        self.app.router.add_get('/api/{series}', self.handle_series)
+        self._runner = None
+        self._bodies = OrderedDict()
+
+    @property
+    def running(self):
+        return self._runner is not None
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Stats API listening on http://{self.host}:{self.port}/api/")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def publish_sample(self, **records):
+        """Push a freshly recorded sample (series name -> record) to live viewers."""
+        data = dict(records)
+        data['seq'] = {name: self.series[name].last_seq for name in records if name in self.series}
+        self.broadcaster.publish('sample', data)
+
+    async def handle_stream(self, request):
+        if self.viewers >= self.max_viewers:
+            raise web.HTTPServiceUnavailable(text='Too many live viewers')
+
+        last_id = self.broadcaster.resume_from(request.headers.get('Last-Event-ID'))
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Access-Control-Allow-Origin': self.cors_origin,
+            'X-Accel-Buffering': 'no',
+        })
+        await response.prepare(request)
+        self.viewers += 1
+        try:
+            await response.write(b'retry: 5000\n\n')
+            while True:
+                if not await self.broadcaster.wait(last_id, STREAM_KEEPALIVE_SECONDS):
+                    await response.write(b': keepalive\n\n')
+                    continue
+                for event_id, payload in self.broadcaster.since(last_id):
+                    await response.write(payload)
+                    last_id = event_id
+        except ConnectionResetError:
+            pass
+        finally:
+            self.viewers -= 1
+        return response
+
+    def _headers(self, etag, last_modified):
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+            'Access-Control-Allow-Origin': self.cors_origin,
+            'Access-Control-Expose-Headers': 'ETag, Last-Modified, X-Last-Seq',
+        }
+        if last_modified is not None:
+            headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        return headers
+
+    def _body(self, etag, build):
+        """Serialise and gzip the result of build() once per ETag."""
+        cached = self._bodies.get(etag)
+        if cached is None:
+            raw = json.dumps(build(), separators=(',', ':')).encode('utf-8')
+            cached = (raw, gzip.compress(raw, compresslevel=6))
+            self._bodies[etag] = cached
+            while len(self._bodies) > BODY_CACHE_SIZE:
+                self._bodies.popitem(last=False)
+        else:
+            self._bodies.move_to_end(etag)
+        return cached
+
+    async def handle_series(self, request):
+        name = request.match_info['series']
+        store = self.series.get(name)
+        if store is None:
+            raise web.HTTPNotFound(text=json.dumps({'error': f'unknown series: {name}'}),
+                                   content_type='application/json')
+        if 'since_seq' in request.query or 'since' in request.query:
+            return self.respond_delta(name, store, request.query.get('since_seq'), request.query.get('since'))
+        try:
+            start = parse_time_param(request.query.get('from'))
+            end = parse_time_param(request.query.get('to'))
+            step = float(request.query.get('step') or 0)
+            if not math.isfinite(step) or step < 0:
+                raise ValueError(f"step must be a positive number of seconds: {request.query['step']}")
+            points = min(int(request.query.get('points') or 0), MAX_POINTS)
+            if points < 0:
+                raise ValueError(f"points must not be negative: {request.query['points']}")
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=json.dumps({'error': str(e)}), content_type='application/json')
+        return self.respond(request, name, store, *store.bounds(start, end), step=step, points=points)
+
+    def respond(self, request, name, store, lo, hi, step=0, points=0):
+        """Build a conditional, compressed response for records[lo:hi] of a store.
+
+        The ETag identifies the selected records rather than the whole store,
+        so a range that did not change keeps validating after new samples land.
+        """
+        count = hi - lo
+        first = store.times[lo] if count else 0
+        last = store.times[hi - 1] if count else 0
+        identity = f'{name}:{first}:{last}:{count}:{step}:{points}'
+        etag = f'"{zlib.crc32(identity.encode()):08x}-{count}"'
+        last_modified = datetime.fromtimestamp(int(last), timezone.utc) if count else None
+        headers = self._headers(etag, last_modified)
+        if hi == len(store):
+            headers['X-Last-Seq'] = str(store.last_seq)
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            candidates = [value.strip() for value in if_none_match.split(',')]
+            if etag in candidates or '*' in candidates:
+                return web.Response(status=304, headers=headers)
+        elif last_modified is not None and request.if_modified_since is not None:
+            if last_modified <= request.if_modified_since:
+                return web.Response(status=304, headers=headers)
+
+        raw, compressed = self._body(etag, lambda: store.select(lo, hi, step, points))
+        headers['Content-Type'] = 'application/json'
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            headers['Content-Encoding'] = 'gzip'
+            return web.Response(body=compressed, headers=headers)
+        return web.Response(body=raw, headers=headers)
+
+    def respond_delta(self, name, store, since_seq=None, since=None):
+        """Records written after a sequence number or a time, uncompressed and uncached."""
+        reset = False
+        try:
+            if since_seq is not None:
+                seq = int(since_seq)
+                reset = not store.known_seq(seq)
+                records = [] if reset else store.since_seq(seq)
+            else:
+                ts = parse_time_param(since)
+                if ts is None:
+                    raise ValueError("since must be a time")
+                records = store.since_time(ts)
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=json.dumps({'error': str(e)}), content_type='application/json')
+        if len(records) > MAX_POINTS:
+            reset = True
+            records = []
+        body = json.dumps({'series': name, 'last_seq': store.last_seq, 'reset': reset, 'records': records},
+                          separators=(',', ':'))
+        return web.Response(text=body, content_type='application/json', headers={
+            'Cache-Control': 'no-store',
+            'Access-Control-Allow-Origin': self.cors_origin,
+        })
@@ -0,0 +1,23 @@
+"""Atomic JSON writes shared by every module that saves state or data files."""
+import os
+import gzip
+import json
+
+
+def write_json_atomic(path, data, compress=False):
+    """Write compact JSON via a temporary file so readers never see half a file.
+
+    The parent directory is created if needed. With `compress`, a gzipped copy
+    is written next to it as `<path>.gz`.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    targets = [(path, raw)]
+    if compress:
+        # mtime=0 keeps the output stable, so unchanged data is not recommitted.
+        targets.append((path + '.gz', gzip.compress(raw, compresslevel=9, mtime=0)))
+    for target, body in targets:
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, target)
@@ -0,0 +1,55 @@
+from downsample import downsample_records, lttb_indices, series_fields, value_fields
+
+
+def test_value_fields_skip_timestamp_bools_and_non_numbers():
+    record = {'timestamp': '2024-06-15T06:00:00', 'total_members': 10, 'ratio': 0.5,
+              'reconstructed': ['unique_chatters'], 'flag': True}
+    assert value_fields(record) == ['total_members', 'ratio']
+
+
+def test_series_fields_are_the_union_in_first_seen_order():
+    records = [{'timestamp': 0, 'a': 1}, {'timestamp': 1, 'a': 2, 'b': 3}, {'timestamp': 2, 'c': 4}]
+    assert series_fields(records) == ['a', 'b', 'c']
+
+
+def test_short_series_are_returned_whole():
+    assert lttb_indices([0, 1, 2], [[5, 6, 7]], 10) == [0, 1, 2]
+    assert lttb_indices(list(range(10)), [list(range(10))], 0) == list(range(10))
+
+
+def test_thresholds_below_three_still_cap_the_result():
+    xs = list(range(10))
+    assert lttb_indices(xs, [xs], 2) == [0, 9]
+    assert lttb_indices(xs, [xs], 1) == [9]
+
+
+def test_keeps_endpoints_and_threshold():
+    xs = list(range(1000))
+    kept = lttb_indices(xs, [[x % 17 for x in xs]], 50)
+    assert len(kept) == 50
+    assert kept[0] == 0 and kept[-1] == 999
+    assert kept == sorted(set(kept))
+
+
+def test_spike_survives_downsampling():
+    xs = list(range(1000))
+    ys = [1] * 1000
+    ys[537] = 500
+    assert 537 in lttb_indices(xs, [ys], 20)
+
+
+def test_downsample_records_uses_fields_missing_from_the_first_record():
+    times = list(range(300))
+    records = [{'timestamp': t, 'a': 1} for t in times]
+    for record in records[100:]:
+        record['b'] = 0
+    records[250]['b'] = 1000
+    kept = downsample_records(records, times, 10)
+    assert len(kept) == 10
+    assert records[250] in kept
+
+
+def test_downsample_records_under_threshold_is_unchanged():
+    records = [{'timestamp': t, 'a': t} for t in range(5)]
+    assert downsample_records(records, list(range(5)), 10) is records
+    assert downsample_records(records, list(range(5)), 0) is records
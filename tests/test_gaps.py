@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+from gaps import GapTracker, backfill_gap
+
+
+def test_resumed_gap_is_recorded_but_not_flagged(tmp_path):
+    tracker = GapTracker(str(tmp_path / 'gaps.json'))
+    tracker.seen(100)
+    tracker.disconnected(200)
+    tracker.disconnected(203)
+    gap = tracker.reconnected(205, resumed=True)
+    assert gap == {'start': 200, 'end': 205, 'resumed': True, 'backfilled': None}
+    assert not tracker.unsampled_gap
+
+
+def test_flag_is_raised_only_once_a_backfill_finished(tmp_path):
+    tracker = GapTracker(str(tmp_path / 'gaps.json'))
+    tracker.disconnected(300)
+    gap = tracker.reconnected(400, resumed=False)
+    assert not tracker.unsampled_gap
+    tracker.backfilled(gap, 12)
+    assert tracker.unsampled_gap
+    assert tracker.gaps[-1]['backfilled'] == 12
+
+
+def test_reconnect_without_a_disconnect_is_not_a_gap(tmp_path):
+    tracker = GapTracker(str(tmp_path / 'gaps.json'))
+    assert tracker.reconnected(50, resumed=False) is None
+    assert tracker.last_seen == 50
+
+
+def test_restart_counts_as_a_gap_since_last_seen(tmp_path):
+    path = str(tmp_path / 'gaps.json')
+    tracker = GapTracker(path)
+    tracker.seen(1000)
+    tracker.save()
+
+    restarted = GapTracker(path)
+    restarted.load()
+    restarted.seen(1500)  # ignored until the gap is closed
+    gap = restarted.reconnected(2000, resumed=False)
+    assert (gap['start'], gap['end']) == (1000, 2000)
+
+
+def test_only_the_newest_gaps_are_kept(tmp_path):
+    tracker = GapTracker(str(tmp_path / 'gaps.json'), keep=2)
+    for start in (10, 20, 30):
+        tracker.disconnected(start)
+        tracker.reconnected(start + 1, resumed=True)
+    assert [gap['start'] for gap in tracker.gaps] == [20, 30]
+
+
+class FakeChannel:
+    def __init__(self, name, count=0, error=None):
+        self.name = name
+        self.count = count
+        self.error = error
+        self.calls = []
+
+    def history(self, **kwargs):
+        self.calls.append(kwargs)
+
+        async def messages():
+            if self.error:
+                raise self.error
+            for i in range(min(self.count, kwargs['limit'])):
+                yield SimpleNamespace(id=i)
+        return messages()
+
+
+def test_backfill_reads_each_channel_within_limits():
+    start = datetime(2024, 6, 15, 6, tzinfo=timezone.utc)
+    end = datetime(2024, 6, 15, 7, tzinfo=timezone.utc)
+    forbidden = discord.Forbidden(SimpleNamespace(status=403, reason='Forbidden'), 'no access')
+    channels = [FakeChannel('busy', 250), FakeChannel('quiet', 3), FakeChannel('private', error=forbidden)]
+    seen = []
+
+    total = asyncio.run(backfill_gap(channels, start, end, seen.append, max_messages=200, page_pause=0))
+
+    assert total == 203
+    assert len(seen) == 203
+    assert channels[0].calls == [{'limit': 200, 'after': start, 'before': end, 'oldest_first': True}]
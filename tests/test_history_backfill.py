@@ -0,0 +1,124 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import discord
+
+from counters import BucketedCounter
+from history_backfill import HISTORY_PAGE_SIZE, HistoryBackfill, RateBudget
+
+NOW = 1718431200
+
+
+class FakeChannel:
+    """Serves `count` messages, one a minute ending at NOW, newest first like Discord."""
+
+    def __init__(self, channel_id, count, fail_after=None):
+        self.id = channel_id
+        self.name = f'channel-{channel_id}'
+        self.pages = 0
+        self.fail_after = fail_after
+        self.messages = [
+            SimpleNamespace(id=channel_id * 10 ** 6 + i, author=SimpleNamespace(bot=i % 10 == 0),
+                            created_at=datetime.fromtimestamp(NOW - (count - i) * 60, timezone.utc))
+            for i in range(count)
+        ]
+
+    def history(self, limit, before, after, oldest_first):
+        assert not oldest_first
+        self.pages += 1
+        if self.fail_after is not None and self.pages > self.fail_after:
+            raise asyncio.TimeoutError()
+        if isinstance(before, discord.Object):
+            page = [m for m in self.messages if m.id < before.id and m.created_at > after]
+        else:
+            page = [m for m in self.messages if before > m.created_at > after]
+        page = sorted(page, key=lambda m: m.id, reverse=True)[:limit]
+
+        async def messages():
+            for message in page:
+                yield message
+        return messages()
+
+
+def expected(channels, since):
+    return sum(1 for channel in channels for m in channel.messages
+               if not m.author.bot and m.created_at.timestamp() > since)
+
+
+def test_rate_budget_spaces_out_acquisitions():
+    async def acquire_all():
+        budget = RateBudget(rate=50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            await budget.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(acquire_all()) >= 0.09
+
+
+def test_backfill_counts_every_message_back_to_since(tmp_path):
+    channels = [FakeChannel(1, 2 * HISTORY_PAGE_SIZE + 30), FakeChannel(2, 40), FakeChannel(3, 0)]
+    counter = BucketedCounter()
+    backfill = HistoryBackfill(str(tmp_path / 'backfill.json'), counter, rate=1000, concurrency=2)
+    since = NOW - 86400
+    backfill.plan(since, NOW)
+
+    counted = asyncio.run(backfill.run(channels))
+
+    assert counted == expected(channels, since) == counter.totals()['messages']
+    assert backfill.done
+
+
+def test_interrupted_backfill_resumes_from_the_saved_checkpoint(tmp_path):
+    path = str(tmp_path / 'backfill.json')
+    counter_path = str(tmp_path / 'activity.json')
+    channels = [FakeChannel(1, 5 * HISTORY_PAGE_SIZE, fail_after=2), FakeChannel(2, 150)]
+    since = NOW - 7 * 86400
+
+    counter = BucketedCounter()
+    first = HistoryBackfill(path, counter, rate=1000)
+    first.plan(since, NOW)
+    asyncio.run(first.run(channels))
+    assert not first.done
+    # The owner checkpoints the counter and the cursors together.
+    counter.save(counter_path)
+    first.save()
+
+    channels[0].fail_after = None
+    resumed_counter = BucketedCounter.load(counter_path)
+    resumed = HistoryBackfill(path, resumed_counter, rate=1000)
+    resumed.load()
+    resumed.plan(since, NOW + 3600)
+    asyncio.run(resumed.run(channels))
+
+    assert resumed.done
+    assert resumed.until == NOW
+    assert resumed_counter.totals()['messages'] == expected(channels, since)
+
+
+def test_moving_since_back_continues_from_the_cursors(tmp_path):
+    channels = [FakeChannel(1, 3000)]
+    counter = BucketedCounter()
+    backfill = HistoryBackfill(str(tmp_path / 'backfill.json'), counter, rate=1000)
+    backfill.plan(NOW - 86400, NOW)
+    asyncio.run(backfill.run(channels))
+    backfill.plan(NOW - 3 * 86400, NOW)
+    asyncio.run(backfill.run(channels))
+    assert counter.totals()['messages'] == expected(channels, NOW - 3 * 86400)
+
+
+def test_paused_backfill_waits_for_the_live_cycle(tmp_path):
+    async def scenario():
+        channel = FakeChannel(1, 50)
+        backfill = HistoryBackfill(str(tmp_path / 'backfill.json'), BucketedCounter(), rate=1000)
+        backfill.plan(NOW - 86400, NOW)
+        backfill.pause()
+        task = asyncio.create_task(backfill.run([channel]))
+        await asyncio.sleep(0.05)
+        assert channel.pages == 0
+        backfill.resume()
+        return await task
+
+    assert asyncio.run(scenario()) == 45
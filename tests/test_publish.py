@@ -0,0 +1,75 @@
+import gzip
+import json
+
+from publish import decode_columns, encode_columns, publish_dashboard_artifacts
+from series import SeriesStore
+
+
+def test_columns_round_trip():
+    records = [
+        {'timestamp': '2024-06-15T06:00:00', 'messages_last_10min': 4},
+        {'timestamp': '2024-06-15T06:10:00', 'messages_last_10min': 7},
+    ]
+    columns = encode_columns(records)
+    assert columns == {'t': [1718431200, 600], 'messages_last_10min': [4, 7]}
+    assert decode_columns(columns) == [
+        {'timestamp': 1718431200, 'messages_last_10min': 4},
+        {'timestamp': 1718431800, 'messages_last_10min': 7},
+    ]
+
+
+def test_columns_keep_fields_missing_from_the_first_record():
+    records = [
+        {'timestamp': '2024-06-15T06:00:00', 'messages_last_10min': 4},
+        {'timestamp': '2024-06-15T06:10:00', 'messages_last_10min': 7, 'unique_chatters': 3},
+        {'timestamp': '2024-06-15T06:20:00', 'messages_last_10min': 2, 'unique_chatters': 1,
+         'reconstructed': ['unique_chatters']},
+    ]
+    columns = encode_columns(records)
+    assert columns['unique_chatters'] == [None, 3, 1]
+    assert columns['reconstructed'] == [None, None, ['unique_chatters']]
+    decoded = decode_columns(columns)
+    assert [sorted(record) for record in decoded] == [sorted(record) for record in records]
+
+
+def test_empty_series():
+    assert encode_columns([]) == {'t': []}
+    assert decode_columns({'t': []}) == []
+
+
+def _stores():
+    members = SeriesStore([
+        {'timestamp': f'2024-06-15T{hour:02d}:00:00', 'total_members': 100 + hour, 'online_members': 10 + hour}
+        for hour in range(24)
+    ])
+    messages = SeriesStore([
+        {'timestamp': f'2024-06-15T{hour:02d}:00:00', 'messages_last_10min': hour}
+        for hour in range(24)
+    ])
+    return members, messages
+
+
+def test_artifacts_are_windowed_and_decodable(tmp_path):
+    members, messages = _stores()
+    now = members.last_time
+    publish_dashboard_artifacts(str(tmp_path), members, messages, now=now, compress=True)
+
+    with open(tmp_path / 'ranges' / '6h.json') as f:
+        six_hours = json.load(f)
+    assert six_hours['format'] == 'columnar'
+    decoded = decode_columns(six_hours['members'])
+    assert [record['timestamp'] for record in decoded] == [now - 6 * 3600 + hour * 3600 for hour in range(7)]
+    assert decoded[-1]['total_members'] == 123
+
+    with gzip.open(tmp_path / 'ranges' / '6h.json.gz') as f:
+        assert json.load(f) == six_hours
+    with open(tmp_path / 'latest.json') as f:
+        assert json.load(f) == {'timestamp': '2024-06-15T23:00:00', 'total_members': 123,
+                                'online_members': 33, 'messages_last_10min': 23}
+
+
+def test_records_format_keeps_the_stored_records(tmp_path):
+    members, messages = _stores()
+    publish_dashboard_artifacts(str(tmp_path), members, messages, now=members.last_time, fmt='records')
+    with open(tmp_path / 'ranges' / 'all.json') as f:
+        assert json.load(f)['messages'] == messages.records
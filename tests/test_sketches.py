@@ -0,0 +1,96 @@
+import random
+from collections import Counter
+
+from sketches import HyperLogLog, SpaceSaving, UniqueCounter, WindowedTopK
+
+
+def test_space_saving_is_exact_under_capacity():
+    sketch = SpaceSaving(capacity=10)
+    stream = [1, 2, 2, 3, 3, 3]
+    for key in stream:
+        sketch.add(key)
+    assert sketch.top(3) == [(3, 3, 0), (2, 2, 0), (1, 1, 0)]
+    assert sketch.total == len(stream)
+
+
+def test_space_saving_keeps_heavy_hitters_within_error_bounds():
+    rng = random.Random(7)
+    stream = [rng.randrange(1000) for _ in range(5000)] + [42] * 800 + [7] * 600
+    rng.shuffle(stream)
+    sketch = SpaceSaving(capacity=50)
+    for key in stream:
+        sketch.add(key)
+    truth = Counter(stream)
+    assert len(sketch) == 50
+    top = sketch.top(2)
+    assert [key for key, _, _ in top] == [42, 7]
+    for key, count, error in sketch.top(50):
+        assert count - error <= truth[key] <= count
+        assert error <= len(stream) / 50
+
+
+def test_space_saving_round_trips():
+    sketch = SpaceSaving(capacity=3)
+    for key in [1, 1, 2, 3, 4, 4, 4]:
+        sketch.add(key)
+    restored = SpaceSaving.from_dict(sketch.to_dict())
+    assert restored.top(3) == sketch.top(3)
+    restored.add(5)
+    assert len(restored) == 3
+
+
+def test_windowed_top_k_rolls_into_summaries():
+    windowed = WindowedTopK(window_seconds=100, capacity=10, k=2)
+    for ts, key in [(5, 1), (6, 1), (7, 2), (150, 3)]:
+        windowed.add(ts, key)
+    assert windowed.closed == [{'start': 0, 'end': 100, 'total': 3, 'top': [['1', 2, 0], ['2', 1, 0]]}]
+    assert windowed.window_start == 100
+    assert windowed.sketch.top(1) == [(3, 1, 0)]
+
+
+def test_hyperloglog_estimates_within_a_few_percent():
+    for n in (10, 1000, 50000):
+        sketch = HyperLogLog(p=11)
+        for i in range(n):
+            sketch.add(i)
+        assert abs(sketch.count() - n) <= max(1, 0.05 * n)
+
+
+def test_hyperloglog_switches_to_dense_and_round_trips():
+    sketch = HyperLogLog(p=8)
+    for i in range(20):
+        sketch.add(i)
+    assert sketch.dense is None
+    assert HyperLogLog.from_dict(sketch.to_dict()).count() == sketch.count()
+    for i in range(20, 2000):
+        sketch.add(i)
+    assert sketch.dense is not None
+    assert HyperLogLog.from_dict(sketch.to_dict()).count() == sketch.count()
+
+
+def test_hyperloglog_merge_counts_the_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        a.add(i)
+    for i in range(2000, 5000):
+        b.add(i)
+    assert abs(a.merge(b).count() - 5000) <= 250
+
+
+def test_unique_counter_merges_channels_and_windows(tmp_path):
+    counter = UniqueCounter(p=11, retention=3)
+    for author in range(100):
+        counter.add(1, author)
+        counter.add(2, author)
+    assert abs(counter.close(600) - 100) <= 5
+    for author in range(50, 150):
+        counter.add(1, author)
+    assert abs(counter.estimate(since=0) - 150) <= 8
+    assert abs(counter.estimate(since=600) - 100) <= 5
+
+    path = str(tmp_path / 'unique.json')
+    counter.close(1200)
+    counter.save(path)
+    restored = UniqueCounter.load(path, p=11, retention=3)
+    assert restored.estimate() == counter.estimate()
+    assert not UniqueCounter.load(path, p=12).windows
@@ -0,0 +1,61 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from series import SeriesStore
+from stats_api import StatsAPI
+
+RECORDS = [{'timestamp': f'2024-06-15T06:{minute:02d}:00', 'total_members': minute} for minute in range(0, 50, 10)]
+
+
+def get_json(api, *paths):
+    """(status, body) for each path, fetched from one server."""
+    async def fetch():
+        results = []
+        async with TestClient(TestServer(api.app)) as client:
+            for path in paths:
+                response = await client.get(path)
+                results.append((response.status, await response.json()))
+        return results
+    return asyncio.run(fetch())
+
+
+def test_since_seq_returns_records_after_a_sequence_number():
+    store = SeriesStore(RECORDS, first_seq=1718431200000000)
+    api = StatsAPI({'members': store})
+    [(status, delta)] = get_json(api, f'/api/members?since_seq={store.last_seq - 2}')
+    assert status == 200
+    assert not delta['reset']
+    assert delta['records'] == RECORDS[-2:]
+    assert delta['last_seq'] == store.last_seq
+
+
+def test_since_seq_from_another_run_asks_for_a_reload():
+    store = SeriesStore(RECORDS, first_seq=1718431200000000)
+    api = StatsAPI({'members': store})
+    [(status, delta)] = get_json(api, '/api/members?since_seq=42')
+    assert status == 200
+    assert delta['reset'] and delta['records'] == []
+
+
+def test_since_accepts_epoch_seconds_and_iso_timestamps():
+    # 2024-06-15T06:20:00 UTC
+    api = StatsAPI({'members': SeriesStore(RECORDS, first_seq=1718431200000000)})
+    paths = [f'/api/members?since={since}' for since in ('1718432400', '1718432400.0', '2024-06-15T06:20:00')]
+    for status, delta in get_json(api, *paths):
+        assert status == 200
+        assert not delta['reset']
+        assert delta['records'] == RECORDS[3:]
+
+
+def test_invalid_delta_parameters_are_rejected():
+    api = StatsAPI({'members': SeriesStore(RECORDS)})
+    responses = get_json(api, '/api/members?since_seq=yesterday', '/api/members?since=not-a-time')
+    assert [status for status, _ in responses] == [400, 400]
+
+
+def test_points_caps_the_range_even_below_three():
+    api = StatsAPI({'members': SeriesStore(RECORDS)})
+    responses = get_json(api, '/api/members?points=1', '/api/members?points=2', '/api/members?points=3')
+    assert [len(body) for _, body in responses] == [1, 2, 3]
+    assert responses[0][1] == RECORDS[-1:]
@@ -0,0 +1,12 @@
+import gzip
+import json
+
+from storage import write_json_atomic
+
+
+def test_creates_parent_directory_and_gzip_copy(tmp_path):
+    path = tmp_path / 'nested' / 'state' / 'data.json'
+    write_json_atomic(str(path), {'a': [1, 2]}, compress=True)
+    assert json.loads(path.read_text()) == {'a': [1, 2]}
+    assert json.loads(gzip.decompress((tmp_path / 'nested' / 'state' / 'data.json.gz').read_bytes())) == {'a': [1, 2]}
+    assert sorted(p.name for p in path.parent.iterdir()) == ['data.json', 'data.json.gz']
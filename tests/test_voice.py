@@ -0,0 +1,18 @@
+from voice import VoiceTracker
+
+
+def test_sample_reports_window_and_running_total():
+    tracker = VoiceTracker()
+    tracker.seed(0, {1: 2})
+    assert tracker.sample(60) == {'in_voice': 2, 'active_voice_channels': 1,
+                                  'voice_minutes': 2.0, 'voice_minutes_total': 2.0}
+    tracker.move(90, 1, None)
+    sample = tracker.sample(150)
+    assert sample['voice_minutes'] == 2.0
+    assert sample['voice_minutes_total'] == 4.0
+
+
+def test_running_total_carries_on_from_previous_total():
+    tracker = VoiceTracker(voice_minutes_total=10.0)
+    tracker.seed(0, {1: 1})
+    assert tracker.sample(60)['voice_minutes_total'] == 11.0
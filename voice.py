@@ -0,0 +1,61 @@
+"""Voice channel occupancy kept up to date from voice state events.
+
+Each `on_voice_state_update` moves one member between channel counters, and
+voice-minutes are integrated lazily: before the occupancy changes, the time
+since the previous change multiplied by the number of people in voice is
+added to a running total. Events cost O(1) and a tick just reads the
+counters; nothing walks `guild.voice_channels` except when (re)seeding after
+a connect.
+"""
+
+
+class VoiceTracker:
+    def __init__(self, voice_minutes_total=0.0):
+        self.occupancy = {}
+        self.in_voice = 0
+        self.voice_seconds = voice_minutes_total * 60
+        self._window_seconds = 0.0
+        self._last_change = None
+
+    def _advance(self, now):
+        if self._last_change is not None:
+            elapsed = max(0.0, now - self._last_change) * self.in_voice
+            self.voice_seconds += elapsed
+            self._window_seconds += elapsed
+        self._last_change = now
+
+    def seed(self, now, occupancy):
+        """Replace the counters with `occupancy` (channel ID -> members), e.g. after a connect."""
+        self._advance(now)
+        self.occupancy = {channel_id: count for channel_id, count in occupancy.items() if count}
+        self.in_voice = sum(self.occupancy.values())
+
+    def move(self, now, before_channel_id, after_channel_id):
+        """A member left `before_channel_id` and/or joined `after_channel_id` (None for neither)."""
+        if before_channel_id == after_channel_id:
+            return
+        self._advance(now)
+        if before_channel_id is not None:
+            count = self.occupancy.get(before_channel_id, 0) - 1
+            if count > 0:
+                self.occupancy[before_channel_id] = count
+            else:
+                self.occupancy.pop(before_channel_id, None)
+            if count >= 0:
+                self.in_voice -= 1
+        if after_channel_id is not None:
+            self.occupancy[after_channel_id] = self.occupancy.get(after_channel_id, 0) + 1
+            self.in_voice += 1
+
+    def sample(self, now):
+        """Current occupancy, the voice-minutes accumulated since the previous
+        sample and the running total of voice-minutes."""
+        self._advance(now)
+        minutes = self._window_seconds / 60
+        self._window_seconds = 0.0
+        return {
+            'in_voice': self.in_voice,
+            'active_voice_channels': len(self.occupancy),
+            'voice_minutes': round(minutes, 1),
+            'voice_minutes_total': round(self.voice_seconds / 60, 1),
+        }